@@ -0,0 +1,257 @@
+"""
+Throughput benchmarks for the cube_gym/CubeGym-v0 registration.
+
+Run from the repository root:
+
+    python benchmarks/bench_cube_gym.py --output bench.jsonl
+    python benchmarks/bench_cube_gym.py --quick
+
+Every measurement is written as one JSON object per line, so the results of two
+releases can be compared with any JSON or line-based diff tool.
+"""
+import argparse
+import json
+import os
+import platform
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+
+SRC = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "src")
+sys.path.append(SRC)
+os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+
+import gym
+import numpy as np
+
+import cube_gym
+from cube_gym.envs import CubeGym, CubeGymVector, EnvSpec, TableCache
+from cube_gym.envs.dynamic_obstacles import RandomWalk
+from cube_gym.envs.occupancy import Occupancy
+from cube_gym.envs.transition_model import _cached_transition_model
+from cube_gym.wrappers import ClipReward, RelativePosition
+
+ENV_ID = "cube_gym/CubeGym-v0"
+
+WRAPPERS = {
+    "none": [],
+    "clip": [lambda env: ClipReward(env, -20, 100)],
+    "relative": [RelativePosition],
+    "clip+relative": [lambda env: ClipReward(env, -20, 100), RelativePosition],
+}
+
+
+def random_obstacles(size, count, rng):
+    return rng.integers(0, size, size=(count, 3))
+
+
+def make_env(size, obstacles=0, render_mode=None, wrappers="none", seed=0, fast=False):
+    env = gym.make(ENV_ID, size=size, render_mode=render_mode, fast=fast)
+    env.unwrapped.set_obstacles(random_obstacles(size, obstacles, np.random.default_rng(seed)))
+    # Frames are timed, not watched, so human mode must not sleep to hold its framerate
+    env.unwrapped.metadata = dict(env.unwrapped.metadata, render_fps=10 ** 6)
+    for wrapper in WRAPPERS[wrappers]:
+        env = wrapper(env)
+    return env
+
+
+def bench_step(size, obstacles, wrappers, steps, fast=False):
+    env = make_env(size, obstacles, wrappers=wrappers, fast=fast)
+    actions = np.random.default_rng(0).integers(0, 5, size=steps).tolist()
+    env.reset(seed=0)
+    resets = 0
+    start = time.perf_counter()
+    for action in actions:
+        terminated = env.step(action)[2]
+        if terminated:
+            env.reset()
+            resets += 1
+    elapsed = time.perf_counter() - start
+    env.close()
+    return {"steps_per_sec": steps / elapsed, "episodes": resets}
+
+
+def bench_dynamic(size, obstacles, moving, steps):
+    # Obstacle updates alone, incremental versus rebuilding the occupancy tables every step
+    rng = np.random.default_rng(0)
+    occupancy = Occupancy(random_obstacles(size, obstacles, rng), size)
+    motion = RandomWalk(moving)
+    motion.reset(occupancy.obstacles, size, rng)
+    start = time.perf_counter()
+    for _ in range(steps):
+        occupancy.move(*motion.step(occupancy.obstacles))
+    incremental = (time.perf_counter() - start) / steps
+    start = time.perf_counter()
+    for _ in range(max(1, steps // 100)):
+        Occupancy(occupancy.obstacles, size)
+    rebuild = (time.perf_counter() - start) / max(1, steps // 100)
+
+    env = CubeGym(size=size, obstacle_motion=RandomWalk(moving))
+    env.set_obstacles(random_obstacles(size, obstacles, np.random.default_rng(0)))
+    env.reset(seed=0)
+    actions = rng.integers(0, 5, size=steps).tolist()
+    start = time.perf_counter()
+    for action in actions:
+        if env.step(action)[2]:
+            env.reset()
+    elapsed = time.perf_counter() - start
+    return {"update_us": 1e6 * incremental, "rebuild_us": 1e6 * rebuild, "steps_per_sec": steps / elapsed}
+
+
+def bench_reset(size, obstacles, resets):
+    env = make_env(size, obstacles)
+    start = time.perf_counter()
+    for _ in range(resets):
+        env.reset()
+    elapsed = time.perf_counter() - start
+    env.close()
+    return {"resets_per_sec": resets / elapsed}
+
+
+def bench_warm_start(size, obstacles, repeats):
+    # Time to a reset fast-mode env, building every table versus mapping them from a warm TableCache
+    spec = EnvSpec.create(size, random_obstacles(size, obstacles, np.random.default_rng(0)))
+    with tempfile.TemporaryDirectory() as directory:
+        cache = TableCache(directory)
+        cache.get(spec)
+        timings = {}
+        for name, create in (("cold", lambda: CubeGym(size=size, obstacles=spec.obstacles, fast=True)),
+                             ("warm", lambda: CubeGym.from_spec(spec, cache, fast=True))):
+            start = time.perf_counter()
+            for _ in range(repeats):
+                # A fresh worker has nothing cached in memory either
+                _cached_transition_model.cache_clear()
+                env = create()
+                env.reset()
+            timings[f"{name}_ms"] = 1e3 * (time.perf_counter() - start) / repeats
+    return timings
+
+
+def bench_vector(num_envs, size, obstacles, steps):
+    env = CubeGymVector(num_envs=num_envs, size=size,
+                        obstacles=random_obstacles(size, obstacles, np.random.default_rng(0)))
+    actions = np.random.default_rng(0).integers(0, 5, size=(steps, num_envs))
+    env.reset(seed=0)
+    start = time.perf_counter()
+    for batch in actions:
+        env.step(batch)
+    elapsed = time.perf_counter() - start
+    return {"steps_per_sec": steps * num_envs / elapsed, "batch_steps_per_sec": steps / elapsed}
+
+
+def bench_memory(size, obstacles, count, vectorized=False):
+    tracemalloc.start()
+    before = tracemalloc.get_traced_memory()[0]
+    if vectorized:
+        envs = CubeGymVector(num_envs=count, size=size,
+                             obstacles=random_obstacles(size, obstacles, np.random.default_rng(0)))
+        envs.reset(seed=0)
+    else:
+        envs = [make_env(size, obstacles, seed=i) for i in range(count)]
+        for env in envs:
+            env.reset(seed=0)
+    after = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    return {"bytes_per_env": (after - before) / count}
+
+
+def bench_render(size, obstacles, render_mode, frames):
+    env = make_env(size, obstacles, render_mode=render_mode)
+    env.reset(seed=0)
+    actions = np.random.default_rng(0).integers(0, 5, size=frames).tolist()
+    elapsed = 0.0
+    for action in actions:
+        if env.step(action)[2]:
+            env.reset()
+        start = time.perf_counter()
+        if render_mode == "human":
+            env.unwrapped._render_frame()
+        else:
+            env.render()
+        elapsed += time.perf_counter() - start
+    env.close()
+    return {"frame_ms": 1000 * elapsed / frames}
+
+
+def bench_import(repeats):
+    # Every import is timed in a fresh interpreter, so nothing is cached between runs
+    script = "import time; start = time.perf_counter(); import cube_gym.envs; print(time.perf_counter() - start)"
+    environment = dict(os.environ, PYTHONPATH=SRC)
+    timings = []
+    for _ in range(repeats):
+        result = subprocess.run([sys.executable, "-c", script], env=environment,
+                                capture_output=True, text=True, check=True)
+        timings.append(float(result.stdout.strip().splitlines()[-1]))
+    return {"import_sec": min(timings), "import_sec_median": float(np.median(timings))}
+
+
+def run(args):
+    steps = 2000 if args.quick else args.steps
+    sizes = [5, 10] if args.quick else [5, 10, 25, 50, 100]
+    obstacle_counts = [0, 10] if args.quick else [0, 10, 100, 1000]
+    render_modes = ["rgb_array"] if args.quick else ["rgb_array", "3d_array", "human"]
+    render_sizes = [5] if args.quick else [5, 10, 25]
+    num_envs = [1, 64] if args.quick else [1, 64, 1024, 16384]
+
+    yield {"benchmark": "environment", "python": platform.python_version(), "numpy": np.__version__,
+           "gym": gym.__version__, "machine": platform.machine()}
+    yield dict(benchmark="import", **bench_import(3 if args.quick else 10))
+
+    for size in sizes:
+        for obstacles in obstacle_counts:
+            for fast in (False, True):
+                yield dict(benchmark="step", size=size, obstacles=obstacles, wrappers="none", fast=fast,
+                           **bench_step(size, obstacles, "none", steps, fast))
+            yield dict(benchmark="reset", size=size, obstacles=obstacles,
+                       **bench_reset(size, obstacles, steps // 10))
+        yield dict(benchmark="memory", size=size, obstacles=10, vectorized=False,
+                   **bench_memory(size, 10, 10))
+        yield dict(benchmark="memory", size=size, obstacles=10, vectorized=True,
+                   **bench_memory(size, 10, 1024))
+
+    for obstacles, moving in [(1000, 0), (1000, 1), (1000, 10), (1000, 100), (1000, 1000), (100, 10), (10000, 10)]:
+        if moving <= obstacles and not (args.quick and obstacles > 1000):
+            yield dict(benchmark="dynamic_obstacles", size=50, obstacles=obstacles, moving=moving,
+                       **bench_dynamic(50, obstacles, moving, steps // 10))
+
+    for size in sizes:
+        yield dict(benchmark="warm_start", size=size, obstacles=10 * size,
+                   **bench_warm_start(size, 10 * size, 3 if args.quick else 10))
+
+    for wrappers in WRAPPERS:
+        yield dict(benchmark="step", size=10, obstacles=10, wrappers=wrappers, fast=False,
+                   **bench_step(10, 10, wrappers, steps))
+
+    for size in sizes:
+        for count in num_envs:
+            yield dict(benchmark="vector_step", size=size, obstacles=10, num_envs=count,
+                       **bench_vector(count, size, 10, max(10, steps // count)))
+
+    for render_mode in render_modes:
+        for size in render_sizes:
+            frames = 5 if render_mode == "3d_array" else 50
+            yield dict(benchmark="render", size=size, obstacles=10, render_mode=render_mode,
+                       **bench_render(size, 10, render_mode, frames))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--output", help="file to write the JSON lines to, standard output by default")
+    parser.add_argument("--steps", type=int, default=20000, help="steps per throughput measurement")
+    parser.add_argument("--quick", action="store_true", help="run a reduced sweep, e.g. as a smoke test")
+    args = parser.parse_args()
+
+    output = open(args.output, "w") if args.output else sys.stdout
+    try:
+        for record in run(args):
+            output.write(json.dumps(record) + "\n")
+            output.flush()
+    finally:
+        if args.output:
+            output.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -1 +1,4 @@
-from cube_gym.envs.cube_gym import CubeGym
\ No newline at end of file
+from cube_gym.envs.cube_gym import CubeGym
+from cube_gym.envs.cube_gym_vector import CubeGymVector
+from cube_gym.envs.env_spec import EnvSpec, TableCache
+from cube_gym.envs.rollout_pool import CubeGymPool
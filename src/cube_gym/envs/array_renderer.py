@@ -0,0 +1,104 @@
+import numpy as np
+
+WHITE = (255, 255, 255)
+BLACK = (0, 0, 0)
+RED = (255, 0, 0)
+BLUE = (0, 0, 255)
+
+
+class ArrayRenderer:
+    """
+    Paints the three orthogonal projections of a CubeGym straight into uint8 NumPy frames.
+
+    The frame follows the human-mode window: Y-Z top left, X-Z top right, X-Y bottom right.
+    Obstacles and gridlines are painted once per layout into a static frame; each render copies
+    it into a preallocated buffer and paints targets and agents on top. The returned frames are
+    that buffer, so they are overwritten by the next call and have to be copied to be kept.
+    No display and no pygame are needed.
+    """
+    # The (column, row) coordinates each projection shows and its (row, column) quadrant
+    PROJECTIONS = (
+        ([1, 2], (0, 0)),   # Y-Z
+        ([0, 2], (0, 1)),   # X-Z
+        ([0, 1], (1, 1))    # X-Y
+    )
+
+    def __init__(self, size, cell_size=8):
+        self.size = size
+        self.cell_size = cell_size
+        side = 2 * size * cell_size
+        self.frame_shape = (side, side, 3)
+        self._static = np.empty(self.frame_shape, dtype=np.uint8)
+        self._frames = np.empty((1,) + self.frame_shape, dtype=np.uint8)
+        self._frame_index = np.zeros((1, 1), dtype=int)
+        self._layout_key = None
+
+        # Pixel offsets, relative to a cell's corner, of the target square and the agent disk
+        rows, columns = np.mgrid[0:cell_size, 0:cell_size]
+        centre = (cell_size - 1) / 2
+        disk = (rows - centre) ** 2 + (columns - centre) ** 2 <= (cell_size / 3) ** 2
+        disk[int(centre), int(centre)] = True
+        self._square = (rows.ravel(), columns.ravel())
+        self._disk = (rows[disk], columns[disk])
+
+    def set_layout(self, obstacles, key=None):
+        """
+        Repaints the static frame, unless `key` matches the layout painted last.
+        """
+        if key is not None and key == self._layout_key:
+            return
+        self._layout_key = key
+        self._static[:] = WHITE
+        obstacles = np.asarray(obstacles, dtype=int).reshape(-1, 3)
+        extent = self.size * self.cell_size
+
+        for axes, (quadrant_row, quadrant_column) in self.PROJECTIONS:
+            projected = obstacles[:, axes]
+            projected = np.unique(projected[np.all((projected >= 0) & (projected < self.size), axis=1)], axis=0)
+            self._paint(self._static[None], np.zeros((1, 1), dtype=int), quadrant_row, quadrant_column,
+                        projected[None, :, 0], projected[None, :, 1], self._square, BLACK)
+
+            # Gridlines along every cell border of the quadrant
+            if self.cell_size >= 3:
+                top, left = quadrant_row * extent, quadrant_column * extent
+                lines = np.arange(0, extent, self.cell_size)
+                self._static[top + lines, left:left + extent] = BLACK
+                self._static[top:top + extent, left + lines] = BLACK
+                self._static[top + extent - 1, left:left + extent] = BLACK
+                self._static[top:top + extent, left + extent - 1] = BLACK
+
+    def _paint(self, frames, frame_index, quadrant_row, quadrant_column, columns, rows, pixels, colour):
+        # Paints `pixels` at the given (N, K) cells of one quadrant in every frame
+        rows = (quadrant_row * self.size + rows) * self.cell_size
+        columns = (quadrant_column * self.size + columns) * self.cell_size
+        frames[
+            frame_index[..., None],
+            rows[..., None] + pixels[0],
+            columns[..., None] + pixels[1]
+        ] = colour
+
+    def render(self, agent_location, target_location):
+        return self.render_batch(np.asarray(agent_location)[None], np.asarray(target_location)[None])[0]
+
+    def render_batch(self, agent_locations, target_locations):
+        """
+        Renders one frame per (agent, target) pair into a reused (N, H, W, 3) buffer.
+        Each frame may show several targets, given as (N, K, 3) locations.
+        """
+        num_frames = len(agent_locations)
+        if self._frames.shape[0] != num_frames:
+            self._frames = np.empty((num_frames,) + self.frame_shape, dtype=np.uint8)
+            self._frame_index = np.arange(num_frames)[:, None]
+        frames = self._frames
+        frames[:] = self._static
+
+        frame_index = self._frame_index
+        for axes, (quadrant_row, quadrant_column) in self.PROJECTIONS:
+            for locations, pixels, colour in (
+                (target_locations, self._square, RED),
+                (agent_locations, self._disk, BLUE)
+            ):
+                locations = np.asarray(locations).reshape(num_frames, -1, 3)
+                self._paint(frames, frame_index, quadrant_row, quadrant_column,
+                            locations[..., axes[0]], locations[..., axes[1]], pixels, colour)
+        return frames
@@ -1,51 +1,154 @@
 import gym
 from gym import spaces
-import pygame
 import numpy as np
 import math
-import matplotlib.pyplot as plt
-from mpl_toolkits.mplot3d import Axes3D
-from mpl_toolkits.mplot3d.art3d import Poly3DCollection
 import sys
+from copy import deepcopy
+import itertools
+from collections import namedtuple
 sys.path.append("../../")
 
 from helpers import *
+from cube_gym.envs.array_renderer import ArrayRenderer
+from cube_gym.envs.occupancy import Occupancy, cell_locations, flat_index, in_grid, make_occupancy, shared_move_table
+from cube_gym.envs.profiling import Profiler
+from cube_gym.envs.transition_model import DEFAULT_REWARDS, Rewards, transition_model
+
+# The moves of the five actions "right", "up", "left", "down" and "forward"
+ACTION_DIRECTIONS = [
+    [1, 0, 0],
+    [0, 1, 0],
+    [-1, 0, 0],
+    [0, -1, 0],
+    [0, 0, 1]
+]
+
+# Named action sets: the default five moves, all six axis moves, and all 26 neighbouring cells
+ACTION_SETS = {
+    "default": ACTION_DIRECTIONS,
+    "axes": ACTION_DIRECTIONS + [[0, 0, -1]],
+    "neighbours": [list(offset) for offset in itertools.product((-1, 0, 1), repeat=3) if any(offset)],
+}
+
+# The largest (cell, action) move table kept in memory; beyond it moves are computed per step
+_MAX_MOVE_TABLE_ENTRIES = 2 ** 25
+
+# The fixed obstacle layout used when obstacles are not drawn at random
+DEFAULT_OBSTACLES = [
+    [1, 1, 3],
+    [2, 3, 3],
+    [4, 4, 6],
+    [3, 4, 5],
+    [5, 5, 7],
+    [7, 7, 7]
+]
+
+
+class EnvState(namedtuple("EnvState", [
+    "agent_location", "current_state", "next_state", "current_location", "next_location",
+    "target_location", "steps", "rng_state", "occupancy"
+])):
+    """
+    Snapshot of a CubeGym episode, as returned by `CubeGym.get_state`.
+
+    Locations are copies, the obstacle tables are shared by reference, or copied when obstacles
+    move, and `rng_state` is the bit generator state of `np_random`, or None while the env has
+    not been seeded.
+    """
+    __slots__ = ()
+
 
 class CubeGym(gym.Env):
-    metadata = {"render_modes": ["human", "rgb_array", "3d"], "render_fps": 4}
+    metadata = {"render_modes": ["human", "rgb_array", "3d", "3d_array"], "render_fps": 4}
 
-    def __init__(self, render_mode=None, size=5):
+    def __init__(self, render_mode=None, size=5, fast=False, record_info=None, record_path=None, sparse=None,
+                 max_episode_steps=None, actions="default", targets=None, num_targets=1, obstacle_motion=None,
+                 obstacles=None, rewards=None, tables=None):
         self.size = size  # The size of the square grid
         self.window_size = 1000  # The size of the PyGame window
-        self.fig = plt.figure()
+        self.fig = None  # The matplotlib figure of the 3D view, created on first use
         self.nStates = size ** 3  # The number of states
         self._path = []  # The number of steps taken in the current episode
+        self.steps = 0  # The number of steps taken in the current episode
+        self.max_episode_steps = max_episode_steps  # Episodes are truncated after this many steps, if set
+
+        """
+        In fast mode the agent is a flat integer state stepped through the cached transition model,
+        and the observation arrays are reused buffers that every step overwrites in place.
+        Infos and the path are only recorded on request, which is the default outside fast mode.
+        """
+        if fast and obstacle_motion is not None:
+            raise ValueError("fast mode steps through a transition model, which needs stationary obstacles")
+        self.fast = fast
+        self.record_info = not fast if record_info is None else record_info
+        self.record_path = not fast if record_path is None else record_path
+        self._state = 0
+        self._model = None
+        self._model_key = None
+        self._cell_locations = None
+
+        """
+        With an `obstacle_motion`, e.g. `RandomWalk`, obstacles move after every step and the
+        occupancy tables are updated only at the cells that changed. Every reset starts from the
+        layout last given to `set_obstacles`.
+        """
+        self.obstacle_motion = obstacle_motion
+        self._obstacles_moved = False
+
+        # Set by `enable_profiling`; until then no method carries any instrumentation
+        self.profiler = None
+
+        # Large cubes keep obstacles in sparse tables, so memory follows the obstacle count, not size^3
+        self.sparse = size >= 256 if sparse is None else sparse
+
+        """
+        `rewards` replaces the step, proximity, goal and collision rewards of `DEFAULT_REWARDS`.
+        `tables` are the precomputed dense tables of exactly this configuration, usually mapped
+        read-only from a `TableCache` by `from_spec`; nothing of size^3 is computed with them.
+        """
+        self.rewards = DEFAULT_REWARDS if rewards is None else Rewards(*rewards)
+        if tables is not None:
+            self.sparse = False
+
+        """
+        Targets are the far corner by default, a fixed (K, 3) array of locations, or "random" for
+        `num_targets` distinct free cells drawn at every reset. Reaching any target ends the episode.
+        """
+        if targets is None:
+            targets = [[size - 1] * 3]
+        self._random_targets = isinstance(targets, str)
+        if self._random_targets and targets != "random":
+            raise ValueError(f"unknown targets {targets!r}, expected 'random' or an array of locations")
+        self._fixed_targets = None if self._random_targets else np.array(targets, dtype=int).reshape(-1, 3)
+        self.num_targets = num_targets if self._random_targets else len(self._fixed_targets)
 
         # Observations are dictionaries with the agent's and the target's location.
         # Each location is encoded as an element of {0, ..., `size`}^2, i.e. MultiDiscrete([size, size]).
+        # With several targets, "target" holds all of them as a (K, 3) array.
+        target_shape = (3,) if self.num_targets == 1 else (self.num_targets, 3)
         self.observation_space = spaces.Dict(
             {
                 "agent": spaces.Box(0, size - 1, shape=(3,), dtype=int),
-                "target": spaces.Box(0, size - 1, shape=(3,), dtype=int),
+                "target": spaces.Box(0, size - 1, shape=target_shape, dtype=int),
             }
         )
 
-        # We have 5 actions, corresponding to "right", "up", "left", "down", "forward"
-        self.nActions = 5
-        self.action_space = spaces.Discrete(5)
-
         """
         The following dictionary maps abstract actions from `self.action_space` to 
         the direction we will walk in if that action is taken.
-        I.e. 0 corresponds to "right", 1 to "up" etc.
+        With the default actions, 0 corresponds to "right", 1 to "up" etc.
+        `actions` is the name of one of `ACTION_SETS` or a list of moves.
         """
-        self._action_to_direction = {
-            0: np.array([1, 0, 0]),     #right
-            1: np.array([0, 1, 0]),     #up
-            2: np.array([-1, 0, 0]),    #left
-            3: np.array([0, -1, 0]),    #down
-            4: np.array([0, 0, 1])      #forward
-        }
+        directions = ACTION_SETS[actions] if isinstance(actions, str) else actions
+        self._action_to_direction = {action: np.array(direction) for action, direction in enumerate(directions)}
+        self.nActions = len(self._action_to_direction)
+        self.action_space = spaces.Discrete(self.nActions)
+
+        # Walls are one lookup in the (cell, action) move table, so steps cost the same for any action set.
+        # The table is shared per (size, actions) and only built on the first step that needs it
+        self._moves = tables.moves if tables is not None else None
+        self._lazy_moves = (tables is None and not self.sparse
+                            and self.nStates * self.nActions <= _MAX_MOVE_TABLE_ENTRIES)
 
         assert render_mode is None or render_mode in self.metadata["render_modes"]
         self.render_mode = render_mode
@@ -66,10 +169,59 @@ class CubeGym(gym.Env):
         self.window = None
         self.clock = None
         self.canvas = {'x': None, 'y': None, 'z': None}
+
+        # Each projection shows two of the three coordinates, at a fixed place in the window
+        self._canvas_axes = {'x': [1, 2], 'y': [0, 2], 'z': [0, 1]}
+        self._canvas_offsets = {
+            'x': (0, 0),
+            'y': (self.window_size//2, 0),
+            'z': (self.window_size//2, self.window_size//2)
+        }
+        self._captions_layout = {
+            'Y-Z Axis': (self.window_size/4, self.window_size/2 - 5),
+            'X-Z Axis': (self.window_size/4 + self.window_size/2, self.window_size/2 - 5),
+            'X-Y Axis': (self.window_size/4 + self.window_size/2, self.window_size - 5)
+        }
+        self._static_layers = None
+        self._layers_key = None
+        self._agent_rects = {}
+        self._canvas_dirty = []
+        self._dirty_rects = []
+        self._redraw_window = True
+        self._font = None
+        self._captions = {}
+        self._array_renderer = None
+        self._scene = None
+        self._offscreen_fig = None
+        self._set_targets(self._fixed_targets if self._fixed_targets is not None else np.zeros((num_targets, 3), int))
         self._obstacles = []
-        self._obstacles = self.get_obstacles(Number_of_obstacles=3, random=False)
+        self._tables = tables
+        if tables is not None:
+            obstacles = DEFAULT_OBSTACLES if obstacles is None else obstacles
+            self.set_obstacles(obstacles, Occupancy.from_tables(obstacles, size, tables.blocked, tables.neighbours))
+            self._cell_locations = tables.locations
+            # The tables hold for the spec's layout and targets, identified like the transition model
+            self._tables_key = (self._occupancy.key, self._target_locations.tobytes())
+            self._model = tables.transition_model()
+            self._model_key = self._tables_key
+        elif obstacles is not None:
+            self.set_obstacles(obstacles)
+        else:
+            self._obstacles = self.get_obstacles(Number_of_obstacles=3, random=False)
+
+    @classmethod
+    def from_spec(cls, spec, cache=None, **kwargs):
+        """
+        Creates the env an `EnvSpec` describes, with its derived tables mapped from `cache`, a
+        `TableCache`, if given. Other keyword arguments, e.g. `fast`, are passed to the constructor.
+        """
+        tables = cache.get(spec) if cache is not None else None
+        return cls(size=spec.size, obstacles=spec.obstacles, targets=spec.targets, actions=spec.actions,
+                   rewards=spec.rewards, tables=tables, **kwargs)
 
     def _get_obs(self):
+        if self.fast:
+            return self._observation
         return {"agent": self._agent_location, "target": self._target_location}
 
     def _get_info(self):
@@ -79,30 +231,47 @@ class CubeGym(gym.Env):
             "current_location": self._current_location,
             "next_location": self._next_location,
             "distance": np.linalg.norm(
-                self._agent_location - self._target_location, ord=1
-            )
+                self._agent_location - self._target_locations, ord=1, axis=1
+            ).min()
         }
 
     def reset(self, seed=None, options=None):
         # We need the following line to seed self.np_random
         super().reset(seed=seed)
 
+        # A curriculum can swap in a new maze, e.g. one from `cube_gym.envs.layouts`, at reset
+        if options is not None and "obstacles" in options:
+            self.set_obstacles(options["obstacles"])
+        elif self._obstacles_moved:
+            self._restore_obstacles()
+        if self.obstacle_motion is not None:
+            self.obstacle_motion.reset(self._occupancy.obstacles, self.size, self.np_random)
+
         self._path = []
+        self.steps = 0
 
         # We reset the agent to the bottom left corner
         self._agent_location = np.array([0, 0, 0])
         self.current_state = self._agent_location[0] + self._agent_location[1] * self.size + \
             self._agent_location[2] * self.size * self.size + 1
         self._current_location = self._agent_location
-        self._path.append(self._agent_location)
+        if self.record_path:
+            self._path.append(self._agent_location)
         self.next_state = None
         self._next_location = None
         
-        # We reset the target to the top right corner
-        self._target_location = np.array([self.size-1, self.size-1, self.size-1])
+        # We reset the target to the top right corner, or to the configured or freshly drawn targets
+        self._set_targets(self._draw_targets() if self._random_targets else self._fixed_targets)
+
+        if self.fast:
+            self._load_model()
+            self._state = self.current_state - 1
+            # From here on the agent location is the observation buffer that steps overwrite
+            self._agent_location = self._agent_location.copy()
+            self._observation = {"agent": self._agent_location, "target": self._target_location}
 
         observation = self._get_obs()
-        info = self._get_info()
+        info = self._get_info() if self.record_info else {}
 
         if self.render_mode == "human":
             self._render_frame()
@@ -110,6 +279,10 @@ class CubeGym(gym.Env):
         return observation, info
 
     def step(self, action):
+        self.steps += 1
+        if self.fast:
+            return self._fast_step(action)
+
         # Map the action (element of {0,1,2,3,4}) to the direction we walk in
         direction = self._action_to_direction[action]
         # We use `np.clip` to make sure we don't leave the grid
@@ -128,18 +301,20 @@ class CubeGym(gym.Env):
             self.next_state = self._agent_location[0] + self._agent_location[1] * self.size + \
                 self._agent_location[2] * self.size * self.size + 1
             self._next_location = self._agent_location
-            self._path.append(self._agent_location)
+            if self.record_path:
+                self._path.append(self._agent_location)
             observation = self._get_obs()
-            info = self._get_info()
+            info = self._get_info() if self.record_info else {}
             self.current_state = self.next_state
             self._current_location = self._next_location
         elif terminated:
             if not reached_goal:
                 self.next_state = self.current_state
                 self._next_location = self._current_location
-                self._path.append(self._agent_location)
+                if self.record_path:
+                    self._path.append(self._agent_location)
                 observation = self._get_obs()
-                info = self._get_info()
+                info = self._get_info() if self.record_info else {}
             else:
                 self._agent_location = np.clip(
                 self._agent_location + direction, 0, self.size - 1
@@ -148,50 +323,209 @@ class CubeGym(gym.Env):
                 self.next_state = self._agent_location[0] + self._agent_location[1] * self.size + \
                     self._agent_location[2] * self.size * self.size + 1
                 self._next_location = self._agent_location
-                self._path.append(self._agent_location)
+                if self.record_path:
+                    self._path.append(self._agent_location)
                 observation = self._get_obs()
-                info = self._get_info()
+                info = self._get_info() if self.record_info else {}
                 self.current_state = self.next_state
                 self._current_location = self._next_location
 
+        if self.obstacle_motion is not None:
+            self._move_obstacles()
+        info["reached_goal"] = reached_goal
+        return observation, reward, terminated, self._truncated(terminated), info
+
+    def _truncated(self, terminated):
+        return not terminated and self.max_episode_steps is not None and self.steps >= self.max_episode_steps
+
+    def _set_targets(self, locations):
+        self._target_locations = np.array(locations, dtype=int).reshape(-1, 3)
+        # A single target is observed as a (3,) location, a view that follows in-place updates
+        self._target_location = self._target_locations[0] if len(self._target_locations) == 1 else self._target_locations
+        self._target_cells = frozenset(flat_index(self._target_locations, self.size).tolist())
+
+    def _draw_targets(self):
+        # Distinct free cells other than the start, drawn by rejection so sparse cubes never enumerate cells
+        start = flat_index(self._agent_location, self.size)
+        cells = []
+        while len(cells) < self.num_targets:
+            cell = int(self.np_random.integers(self.nStates))
+            if cell != start and cell not in cells and not self._occupancy.blocked[cell]:
+                cells.append(cell)
+        return cell_locations(self.size, np.array(cells))
+
+    def _next_cell(self, cell, action):
+        if self._lazy_moves:
+            directions = [self._action_to_direction[index] for index in range(self.nActions)]
+            self._moves = shared_move_table(self.size, directions)
+            self._lazy_moves = False
+        if self._moves is not None:
+            return self._moves[cell, action]
+        location = self._agent_location + self._action_to_direction[action]
+        return flat_index(location, self.size) if in_grid(location, self.size) else -1
+
+    def _load_model(self):
+        if self._cell_locations is None:
+            self._cell_locations = cell_locations(self.size)
+        # A model of the layout without targets serves every target set, so new targets never rebuild it
+        if self._model is not None and self._model_key[0] == self._occupancy.key \
+                and self._model_key[1] in (b"", self._target_locations.tobytes()):
+            return
+        directions = [self._action_to_direction[action] for action in range(self.nActions)]
+        no_targets = np.zeros((0, 3), dtype=int)
+        self._model = transition_model(self.size, self._obstacles, directions, no_targets, self.rewards)
+        self._model_key = (self._occupancy.key, no_targets.tobytes())
+
+    def _fast_step(self, action):
+        # Same rules as `step`, read from the precomputed tables instead of evaluated
+        if self.render_mode == "human" or self.render_mode == "3d":
+            self._render_frame()
 
+        state = self._state
+        next_state = self._model.next_state[state, action]
+        self._state = next_state
+        self._agent_location[:] = self._cell_locations[next_state]
+        self.current_state = state + 1
+        self.next_state = next_state + 1
+
+        if self.record_path:
+            self._path.append(self._agent_location.copy())
+        if self.record_info:
+            self._current_location = self._cell_locations[state]
+            self._next_location = self._cell_locations[next_state]
+            info = self._get_info()
+        else:
+            info = {}
+        self.current_state = self.next_state
+
+        terminated = self._model.terminated[state, action]
+        reward = self._model.reward[state, action]
+        reached_goal = self._model.reached_goal[state, action]
+        # The target rule of `build_transition_model`, for a model built without the current targets
+        if not terminated and int(next_state) in self._target_cells:
+            terminated, reward, reached_goal = True, self.rewards.goal, True
+        info["reached_goal"] = reached_goal
+        return self._observation, reward, terminated, self._truncated(terminated), info
+
+    def enable_profiling(self, **kwargs):
+        """
+        Starts timing this instance's step, reward, info and rendering phases, see `Profiler`.
+        Wrappers are timed too when the profiler is attached to the outermost env instead:
+        `Profiler().attach(wrapped_env)`.
+        """
+        if self.profiler is None:
+            Profiler(**kwargs).attach(self)
+        return self.profiler
 
-        return observation, reward, terminated, reached_goal, info
+    def disable_profiling(self):
+        if self.profiler is not None:
+            self.profiler.detach()
 
     def get_reward(self, action):
-        direction = self._action_to_direction[action]
-        reward = 0
-        for obstacle in self._obstacles:
-            if np.array_equal(self._agent_location, obstacle):
-                return True, -20, False
-            elif np.linalg.norm(
-                self._agent_location - obstacle, ord=1
-            ) == 1:
-                reward -= 10
-        
-        if self._agent_location[0] == self.size-1 and action == 0:
-            return True, -20, False
-        elif self._agent_location[0] == 0 and action == 2:
-            return True, -20, False
-        elif self._agent_location[1] == self.size-1 and action == 1:
-            return True, -20, False
-        elif self._agent_location[1] == 0 and action == 3:
-            return True, -20, False
-        elif self._agent_location[2] == self.size-1 and action == 4:
-            return True, -20, False
-            
-        if np.array_equal(self._agent_location + direction, self._target_location):
-            return True, 100, True
-        elif action == 4:
-            reward -= 1
-        elif action != 4:
-            reward -= 1
-        
-        return False, reward, False            
+        # Collisions and the penalty for every adjacent obstacle are looked up in the occupancy tables
+        cell = flat_index(self._agent_location, self.size)
+        if self._occupancy.blocked[cell]:
+            return True, self.rewards.failure, False
+        reward = self.rewards.proximity * int(self._occupancy.neighbours[cell])
+
+        # Walls and targets are looked up in the move table and the target cells
+        next_cell = self._next_cell(cell, action)
+        if next_cell < 0:
+            return True, self.rewards.failure, False
+        if next_cell in self._target_cells:
+            return True, self.rewards.goal, True
+        return False, reward + self.rewards.step, False
+
+
+    def get_state(self):
+        """
+        Captures everything `step` depends on, so a search can branch from here with `set_state`
+        instead of `deepcopy(env)`. The recorded path and all rendering state are left out.
+        """
+        def copy(location):
+            return None if location is None else np.array(location)
+
+        return EnvState(
+            np.array(self._agent_location),
+            self.current_state,
+            self.next_state,
+            copy(self._current_location),
+            copy(self._next_location),
+            np.array(self._target_locations),
+            self.steps,
+            None if self._np_random is None else self._np_random.bit_generator.state,
+            # Moving obstacles update the tables in place, so the snapshot needs its own copy
+            deepcopy(self._occupancy) if self.obstacle_motion is not None else self._occupancy,
+        )
 
+    def set_state(self, state):
+        if self.obstacle_motion is not None:
+            self._occupancy = deepcopy(state.occupancy)
+            self._obstacles = [np.array(obstacle) for obstacle in state.occupancy.obstacles]
+            # The snapshot may hold a moved layout, which the next reset has to restore
+            self._obstacles_moved = True
+        elif state.occupancy is not self._occupancy:
+            self._occupancy = state.occupancy
+            self._obstacles = [np.array(obstacle) for obstacle in state.occupancy.obstacles]
+        if self.fast:
+            # The observation buffers are written in place, so references held by callers stay valid
+            self._agent_location[:] = state.agent_location
+            self._target_locations[:] = state.target_location
+            self._target_cells = frozenset(flat_index(self._target_locations, self.size).tolist())
+            self._state = state.current_state - 1
+            self._load_model()
+        else:
+            self._agent_location = np.array(state.agent_location)
+            self._set_targets(state.target_location)
+        self.current_state = state.current_state
+        self.next_state = state.next_state
+        self._current_location = state.current_location
+        self._next_location = state.next_location
+        self.steps = state.steps
+        if state.rng_state is not None:
+            self.np_random.bit_generator.state = state.rng_state
+
+    def simulate(self, states, actions):
+        """
+        Steps a batch of flat states (`current_state - 1`) without touching the env itself.
+        Returns (next_states, rewards, terminated, reached_goal) arrays, looked up in the cached
+        transition model of the current layout and target.
+        """
+        model = self.transition_model()
+        states = np.asarray(states)
+        actions = np.asarray(actions)
+        return (
+            model.next_state[states, actions],
+            model.reward[states, actions],
+            model.terminated[states, actions],
+            model.reached_goal[states, actions],
+        )
+
+    def distance_field(self):
+        """
+        Shortest path lengths from every cell to the nearest target, -1 where none is reachable, indexed
+        by `current_state - 1`. Read from the mapped tables while the layout and targets are the spec's.
+        """
+        if self._tables is not None and self._tables_key == (self._occupancy.key, self._target_locations.tobytes()):
+            return self._tables.distances
+        # Imported here, as the solvers themselves import from `cube_gym.envs`
+        from cube_gym.solvers.shortest_path import shortest_path_lengths
+        directions = [self._action_to_direction[action] for action in range(self.nActions)]
+        return shortest_path_lengths(self.size, self._obstacles, directions, self._target_locations)
+
+    def transition_model(self):
+        """
+        Returns the whole MDP as (nStates, nActions) next-state, reward, terminated and reached-goal arrays.
+        States are `current_state - 1`. The tables are cached per obstacle layout, target and rewards.
+        """
+        if self._model is not None and self._model_key == (self._occupancy.key, self._target_locations.tobytes()):
+            return self._model
+        directions = [self._action_to_direction[action] for action in range(self.nActions)]
+        return transition_model(self.size, self._obstacles, directions, self._target_locations, self.rewards)
 
     def render(self, mode=None):
-        self.render_mode = mode
+        if mode is not None:
+            self.render_mode = mode
         if self.render_mode == "rgb_array":
             return self._render_frame()
         elif self.render_mode == "human":
@@ -202,60 +536,86 @@ class CubeGym(gym.Env):
             self.render_mode = "human"
             self._render_frame()
             return None
+        elif self.render_mode == "3d_array":
+            return self.render_3d_array()
 
     def _render_frame(self):
-
-        if self.window is None and self.render_mode == "human":
-            pygame.init()
-            pygame.display.init()
-            self.window = pygame.display.set_mode((self.window_size, self.window_size))
-        if self.clock is None and self.render_mode == "human":
-            self.clock = pygame.time.Clock()
-
-
         if self.render_mode == "human":
+            # pygame is only imported once a window is actually drawn, never for rgb_array frames
+            import pygame
+            if self.window is None:
+                pygame.init()
+                pygame.display.init()
+                self.window = pygame.display.set_mode((self.window_size, self.window_size))
+                self._redraw_window = True
+            if self.clock is None:
+                self.clock = pygame.time.Clock()
+
             # The following line copies our drawings from `canvas` to the visible window
             self.canvas = self.update_canvas(self.update_3d)
             self.update_window()
             pygame.event.pump()
-            pygame.display.update()
+            pygame.display.update(self._dirty_rects)
 
             # We need to ensure that human-rendering occurs at the predefined framerate.
             # The following line will automatically add a delay to keep the framerate stable.
             self.clock.tick(self.metadata["render_fps"])
         
         else:  # rgb_array
-            return np.transpose(
-                np.array(pygame.surfarray.pixels3d(canvas)), axes=(1, 0, 2)
-            )
+            # Frames are rasterized with NumPy alone into a reused buffer, so no display is needed
+            if self._array_renderer is None:
+                self._array_renderer = ArrayRenderer(self.size)
+            self._array_renderer.set_layout(self._obstacles, self._occupancy.key)
+            return self._array_renderer.render(self._agent_location, self._target_locations)
 
     def update_window(self):
-        self.window.blit(self.canvas.get('x'), self.canvas.get('x').get_rect())
-        text, textRect = self.get_cpation('Y-Z Axis')
-        self.window.blit(text, textRect)
-        self.window.blit(self.canvas.get('y'), self.canvas.get('y').get_rect(x=self.window_size/2, y =0))
-        text, textRect = self.get_cpation('X-Z Axis')
-        self.window.blit(text, textRect)
-        self.window.blit(self.canvas.get('z'), self.canvas.get('z').get_rect(x=self.window_size/2, y =self.window_size/2))
-        text, textRect = self.get_cpation('X-Y Axis')
-        self.window.blit(text, textRect)
+        if self._redraw_window:
+            # The static layers changed, so the whole window is drawn once
+            for name, canvas in self.canvas.items():
+                self.window.blit(canvas, canvas.get_rect(topleft=self._canvas_offsets[name]))
+            self._dirty_rects = [self.window.get_rect()]
+            self._redraw_window = False
+        else:
+            # Otherwise only the areas the agent left or entered are copied over
+            dirty_rects = []
+            for name, rect in self._canvas_dirty:
+                window_rect = rect.move(self._canvas_offsets[name])
+                self.window.blit(self.canvas[name], window_rect, rect)
+                dirty_rects.append(window_rect)
+            self._dirty_rects = dirty_rects
+        for caption in self._captions_layout:
+            text, textRect = self.get_cpation(caption)
+            if textRect.collidelist(self._dirty_rects) != -1:
+                self.window.blit(text, textRect)
         return
     
     def get_cpation(self, caption):
-        font = pygame.font.Font('freesansbold.ttf', 12)
-        text = font.render(caption, True, (0, 0, 128), (255, 255, 255))
-        textRect = text.get_rect()
-        if caption == 'Y-Z Axis':
-            textRect.center = (self.window_size/4, self.window_size/2 - 5)
-        elif caption == 'X-Z Axis':
-            textRect.center = (self.window_size/4 + self.window_size/2, self.window_size/2 - 5)
-        elif caption == 'X-Y Axis':
-            textRect.center = (self.window_size/4 + self.window_size/2, self.window_size - 5)
-        return text, textRect
+        import pygame
+        # The font is loaded and every caption rendered only once
+        if caption not in self._captions:
+            if self._font is None:
+                self._font = pygame.font.Font('freesansbold.ttf', 12)
+            text = self._font.render(caption, True, (0, 0, 128), (255, 255, 255))
+            textRect = text.get_rect()
+            textRect.center = self._captions_layout[caption]
+            self._captions[caption] = (text, textRect)
+        return self._captions[caption]
     
     def update_canvas(self, plot_3d=False):
         sub_size = self.window_size/2 - 10
 
+        # Background, target, obstacles and gridlines are only redrawn when the layout changes
+        layout_key = (self._occupancy.key, self._target_locations.tobytes())
+        if self._layers_key != layout_key:
+            self._static_layers = {
+                name: self.draw_static_layer(axes, sub_size) for name, axes in self._canvas_axes.items()
+            }
+            self.canvas = {name: layer.copy() for name, layer in self._static_layers.items()}
+            self._agent_rects = {name: None for name in self._canvas_axes}
+            self._layers_key = layout_key
+            self._redraw_window = True
+
+        self._canvas_dirty = []
         self.update_xcanvas(sub_size)
         self.update_ycanvas(sub_size)
         self.update_zcanvas(sub_size)
@@ -264,212 +624,196 @@ class CubeGym(gym.Env):
         return self.canvas
 
     def plot_3dview(self, sub_size=3):
-        axes = [self.size, self.size, self.size]
-        data = np.ones(axes, dtype=np.bool_)
-        alpha = 0.01
-        colors = np.empty(axes + [4], dtype=np.float32)
-        colors[:] = [1, 1, 1, alpha]  # white
-
+        import matplotlib.pyplot as plt
+        if self.fig is None:
+            self.fig = plt.figure()
+        self.update_3d_scene(self.fig)
+        plt.show(block=False)
+        plt.pause(0.000001)
+        return
 
-        ax = self.fig.add_subplot(111, projection='3d')
-        ax.voxels(data, facecolors=colors)
+    def render_3d_array(self):
+        # Offscreen 3D view, drawn by an Agg canvas into an RGB array without any window
+        from matplotlib.backends.backend_agg import FigureCanvasAgg
+        from matplotlib.figure import Figure
+        if self._offscreen_fig is None:
+            self._offscreen_fig = Figure()
+            FigureCanvasAgg(self._offscreen_fig)
+        self.update_3d_scene(self._offscreen_fig)
+        self._offscreen_fig.canvas.draw()
+        return np.asarray(self._offscreen_fig.canvas.buffer_rgba())[..., :3]
+
+    def update_3d_scene(self, figure):
+        # The grid, obstacles and target are built once per layout; afterwards only the agent cube moves
+        layout_key = (self._occupancy.key, self._target_locations.tobytes())
+        if self._scene is not None and self._scene[0] is figure and self._scene[1] == layout_key:
+            self._scene[2].set_verts(cube_faces(self._agent_location))
+            return
+
+        from mpl_toolkits.mplot3d import Axes3D  # Registers the '3d' projection
+        figure.clf()
+        ax = figure.add_subplot(111, projection='3d')
+        if self.sparse:
+            # A size^3 voxel grid does not fit in memory for sparse worlds; only the bounds are drawn
+            for axis in (ax.set_xlim, ax.set_ylim, ax.set_zlim):
+                axis(0, self.size)
+        else:
+            axes = [self.size, self.size, self.size]
+            data = np.ones(axes, dtype=np.bool_)
+            alpha = 0.01
+            colors = np.empty(axes + [4], dtype=np.float32)
+            colors[:] = [1, 1, 1, alpha]  # white
+            ax.voxels(data, facecolors=colors)
         
-        target_cube = draw3d_target_cube(self._target_location, 'red')
+        target_cube = draw3d_cubes(self._target_locations, 'red')
         agent_cube = draw3d_target_cube(self._agent_location, 'blue')
         #Now, we plot the obstacles
-        for obstacle in self._obstacles:
-            obstacle_cube = draw3d_target_cube(obstacle, 'black')
-            ax.add_collection3d(obstacle_cube)
-        #x, y, z = draw3d_agent_sphere(self._agent_location, 0.5)
-        #agent_sphere = ax.plot_surface(x, y, z, color='blue', alpha=0.5)
-        #ax.add_collection3d(agent_sphere)
+        if len(self._obstacles):
+            ax.add_collection3d(draw3d_cubes(self._obstacles, 'black'))
         ax.add_collection3d(agent_cube)
         ax.add_collection3d(target_cube)
-        plt.show(block=False)
-        plt.pause(0.000001)
-        return
-        
+        self._scene = (figure, layout_key, agent_cube)
 
-    def update_xcanvas(self, sub_size=3):
-        #The following line is for the x-axis canvas
-        self.canvas['x'] = pygame.Surface((sub_size, sub_size))
-        self.canvas['x'].fill((255, 255, 255))
+    def draw_static_layer(self, axes, sub_size=3):
+        import pygame
+        layer = pygame.Surface((sub_size, sub_size))
+        layer.fill((255, 255, 255))
         pix_square_size = (
             sub_size / (self.size)
         )  # The size of a single grid square in pixels
 
-        # First we draw the target
-        pygame.draw.rect(
-            self.canvas['x'],
-            (255, 0, 0),
-            pygame.Rect(
-                pix_square_size * self._target_location[1:],
-                (pix_square_size, pix_square_size),
-            ),
-        )
-        #Then, we draw the obstacles
-        for obstacle in self._obstacles:
+        # First we draw the targets
+        for target in self._target_locations:
             pygame.draw.rect(
-                self.canvas['x'],
-                (0, 0, 0),
+                layer,
+                (255, 0, 0),
                 pygame.Rect(
-                    pix_square_size * obstacle[1:],
+                    pix_square_size * target[axes],
                     (pix_square_size, pix_square_size),
                 ),
             )
-        # Now we draw the agent
-        pygame.draw.circle(
-            self.canvas['x'],
-            (0, 0, 255),
-            (self._agent_location[1:] + 0.5) * pix_square_size,
-            pix_square_size / 3,
-        )
+        #Then, we draw the obstacles, once per projected cell
+        if len(self._obstacles):
+            for obstacle in np.unique(np.array(self._obstacles)[:, axes], axis=0):
+                pygame.draw.rect(
+                    layer,
+                    (0, 0, 0),
+                    pygame.Rect(
+                        pix_square_size * obstacle,
+                        (pix_square_size, pix_square_size),
+                    ),
+                )
 
         # Finally, add some gridlines
         for x in range(self.size + 1):
             pygame.draw.line(
-                self.canvas['x'],
+                layer,
                 0,
                 (0, pix_square_size * x),
                 (sub_size, pix_square_size * x),
                 width=3,
             )
             pygame.draw.line(
-                self.canvas['x'],
+                layer,
                 0,
                 (pix_square_size * x, 0),
                 (pix_square_size * x, sub_size),
                 width=3,
             )
-    
-    def update_ycanvas(self, sub_size=3):
-        #The following line is for the y-axis canvas
-        y_target_location = np.array([self._target_location[0], self._target_location[2]])
-        y_agent_location = np.array([self._agent_location[0], self._agent_location[2]])
-        self.canvas['y'] = pygame.Surface((sub_size, sub_size))
-        self.canvas['y'].fill((255, 255, 255))
+        return layer
+
+    def update_agent(self, name, sub_size=3):
+        import pygame
+        canvas = self.canvas[name]
         pix_square_size = (
             sub_size / (self.size)
         )  # The size of a single grid square in pixels
 
-        # First we draw the target
-        pygame.draw.rect(
-            self.canvas['y'],
-            (255, 0, 0),
-            pygame.Rect(
-                pix_square_size * y_target_location,
-                (pix_square_size, pix_square_size),
-            ),
-        )
-        #Then, we draw the obstacles
-        for obstacle in self._obstacles:
-            pygame.draw.rect(
-                self.canvas['y'],
-                (0, 0, 0),
-                pygame.Rect(
-                    pix_square_size * np.array([obstacle[0], obstacle[2]]),
-                    (pix_square_size, pix_square_size),
-                ),
-            )
+        # We restore the static layer where the agent was drawn last frame
+        old_rect = self._agent_rects[name]
+        if old_rect is not None:
+            canvas.blit(self._static_layers[name], old_rect, old_rect)
+            self._canvas_dirty.append((name, old_rect))
+
         # Now we draw the agent
-        pygame.draw.circle(
-            self.canvas['y'],
+        new_rect = pygame.draw.circle(
+            canvas,
             (0, 0, 255),
-            (y_agent_location + 0.5) * pix_square_size,
+            (self._agent_location[self._canvas_axes[name]] + 0.5) * pix_square_size,
             pix_square_size / 3,
         )
+        self._agent_rects[name] = new_rect
+        self._canvas_dirty.append((name, new_rect))
 
-        # Finally, add some gridlines
-        for x in range(self.size + 1):
-            pygame.draw.line(
-                self.canvas['y'],
-                0,
-                (0, pix_square_size * x),
-                (sub_size, pix_square_size * x),
-                width=3,
-            )
-            pygame.draw.line(
-                self.canvas['y'],
-                0,
-                (pix_square_size * x, 0),
-                (pix_square_size * x, sub_size),
-                width=3,
-            )
+    def update_xcanvas(self, sub_size=3):
+        #The following line is for the x-axis canvas
+        self.update_agent('x', sub_size)
+    
+    def update_ycanvas(self, sub_size=3):
+        #The following line is for the y-axis canvas
+        self.update_agent('y', sub_size)
     
     def update_zcanvas(self, sub_size=3):
         #The following line is for the z-axis canvas
-        self.canvas['z'] = pygame.Surface((sub_size, sub_size))
-        self.canvas['z'].fill((255, 255, 255))
-        pix_square_size = (
-            sub_size / (self.size)
-        )  # The size of a single grid square in pixels
-
-        # First we draw the target
-        pygame.draw.rect(
-            self.canvas['z'],
-            (255, 0, 0),
-            pygame.Rect(
-                pix_square_size * self._target_location[:-1],
-                (pix_square_size, pix_square_size),
-            ),
-        )
-        #Then, we draw the obstacles
-        for obstacle in self._obstacles:
-            pygame.draw.rect(
-                self.canvas['z'],
-                (0, 0, 0),
-                pygame.Rect(
-                    pix_square_size * obstacle[:-1],
-                    (pix_square_size, pix_square_size),
-                ),
-            )
-        # Now we draw the agent
-        pygame.draw.circle(
-            self.canvas['z'],
-            (0, 0, 255),
-            (self._agent_location[:-1] + 0.5) * pix_square_size,
-            pix_square_size / 3,
-        )
-
-        # Finally, add some gridlines
-        for x in range(self.size + 1):
-            pygame.draw.line(
-                self.canvas['z'],
-                0,
-                (0, pix_square_size * x),
-                (sub_size, pix_square_size * x),
-                width=3,
-            )
-            pygame.draw.line(
-                self.canvas['z'],
-                0,
-                (pix_square_size * x, 0),
-                (pix_square_size * x, sub_size),
-                width=3,
-            )
+        self.update_agent('z', sub_size)
 
     def close(self):
         if self.window is not None:
+            import pygame
             pygame.display.quit()
             pygame.quit()
 
 
     def get_obstacles(self, Number_of_obstacles=3, random=False):
         if random:
-            for i in range(Number_of_obstacles):
-                self._obstacles.append(self.get_random_location())
-            return self._obstacles
+            # Distinct free cells of the inner cube, drawn with the env's seeded generator by rejection,
+            # so the cost follows the number of obstacles and not size^3
+            inner = max(self.size - 4, 0)
+            inside = [obstacle for obstacle in self._obstacles if np.all((obstacle >= 2) & (obstacle < inner + 2))]
+            free = inner ** 3 - len({tuple(obstacle) for obstacle in inside})
+            drawn = set()
+            while len(drawn) < min(Number_of_obstacles, free):
+                location = cell_locations(inner, int(self.np_random.integers(inner ** 3))) + 2
+                cell = int(flat_index(location, self.size))
+                if cell not in drawn and not self._occupancy.blocked[cell]:
+                    drawn.add(cell)
+                    self._obstacles.append(location)
         else:
-            self._obstacles.append(np.array([1, 1, 3]))
-            self._obstacles.append(np.array([2, 3, 3]))
-            self._obstacles.append(np.array([4, 4, 6]))
-            self._obstacles.append(np.array([3, 4, 5]))
-            self._obstacles.append(np.array([5, 5, 7]))
-            self._obstacles.append(np.array([7, 7, 7]))
-            return self._obstacles             
+            for obstacle in DEFAULT_OBSTACLES:
+                self._obstacles.append(np.array(obstacle))
+        self.set_obstacles(self._obstacles)
+        return self._obstacles
+
+    def set_obstacles(self, obstacles, occupancy=None):
+        # The occupancy tables have to be rebuilt whenever the obstacle layout changes, unless they are given
+        self._obstacles = [np.array(obstacle) for obstacle in obstacles]
+        self._initial_obstacles = list(self._obstacles)
+        # The same layout as one (K, 3) array, which resets compare against to restore moved obstacles
+        self._initial_layout = np.array(self._obstacles, dtype=int).reshape(-1, 3)
+        self._occupancy = make_occupancy(self._obstacles, self.size, self.sparse) if occupancy is None else occupancy
+        self._obstacles_moved = False
+        if self.fast and self._model is not None:
+            # A layout swapped mid-episode takes effect at the next fast step, as it does in `step`
+            self._load_model()
+
+    def _restore_obstacles(self):
+        # Only the obstacles that are away from their initial cell are moved back
+        initial = self._initial_layout
+        indices = np.flatnonzero(np.any(self._occupancy.obstacles != initial, axis=1))
+        self._occupancy.move(indices, initial[indices])
+        self._obstacles = list(self._initial_obstacles)
+        self._obstacles_moved = False
+
+    def _move_obstacles(self):
+        indices, locations = self.obstacle_motion.step(self._occupancy.obstacles)
+        if len(indices):
+            self._occupancy.move(indices, locations)
+            for index, location in zip(indices, locations):
+                self._obstacles[index] = location
+            self._obstacles_moved = True
 
     def get_random_location(self):
-        return np.random.randint(2, self.size-2, size=3)
+        return self.np_random.integers(2, self.size-2, size=3)
 
     def get_agent_location(self):
         return self._agent_location
\ No newline at end of file
@@ -0,0 +1,182 @@
+import numpy as np
+from gym import spaces
+from gym.utils import seeding
+from gym.vector import VectorEnv
+
+from cube_gym.envs.array_renderer import ArrayRenderer
+from cube_gym.envs.cube_gym import ACTION_SETS, DEFAULT_OBSTACLES
+from cube_gym.envs.occupancy import Occupancy, cell_locations, flat_index, move_table
+from cube_gym.envs.transition_model import DEFAULT_REWARDS, Rewards
+
+
+class CubeGymVector(VectorEnv):
+    """
+    `num_envs` copies of CubeGym sharing one obstacle layout, stepped with array operations.
+
+    Every agent is kept as a flat cell index, so a batch step is a handful of table lookups
+    over (N,) arrays instead of N Python calls. Rewards and terminations follow
+    `CubeGym.get_reward` exactly. With `max_episode_steps`, an env that has taken that many
+    steps without terminating is truncated. Finished episodes, terminated or truncated, are
+    reset in place; their last observation is returned in `infos["final_observation"]` as a
+    batched dict, masked by `infos["_final_observation"]`.
+
+    With an `obstacle_motion`, all envs share one world whose obstacles move after every batch
+    step, updating the occupancy tables only where cells changed; `reset` restores the layout.
+    """
+    metadata = {"render_modes": ["rgb_array"], "render_fps": 4}
+
+    def __init__(self, num_envs=1, size=5, obstacles=None, render_mode=None, max_episode_steps=None,
+                 actions="default", obstacle_motion=None, rewards=None):
+        observation_space = spaces.Dict(
+            {
+                "agent": spaces.Box(0, size - 1, shape=(3,), dtype=int),
+                "target": spaces.Box(0, size - 1, shape=(3,), dtype=int),
+            }
+        )
+        # Same action sets and order as CubeGym, by default right, up, left, down, forward
+        self._action_to_direction = np.array(ACTION_SETS[actions] if isinstance(actions, str) else actions)
+        super().__init__(num_envs, observation_space, spaces.Discrete(len(self._action_to_direction)))
+
+        self.size = size
+        self.nStates = size ** 3
+        self.nActions = len(self._action_to_direction)
+        self.rewards = DEFAULT_REWARDS if rewards is None else Rewards(*rewards)
+
+        if obstacles is None:
+            obstacles = DEFAULT_OBSTACLES
+        self.obstacle_motion = obstacle_motion
+        self._initial_obstacles = np.array(obstacles, dtype=int).reshape(-1, 3)
+        self._occupancy = Occupancy(obstacles, size)
+        self._move_table = move_table(size, self._action_to_direction)
+        self._cell_to_location = cell_locations(size)
+
+        self._cells = np.zeros(num_envs, dtype=np.int64)
+        self._target_cells = np.full(num_envs, flat_index([size - 1] * 3, size), dtype=np.int64)
+        self._actions = np.zeros(num_envs, dtype=np.int64)
+        self.max_episode_steps = max_episode_steps
+        self._steps = np.zeros(num_envs, dtype=np.int64)
+
+        assert render_mode is None or render_mode in self.metadata["render_modes"]
+        self.render_mode = render_mode
+        self._renderer = None
+
+    def set_obstacles(self, obstacles):
+        self._initial_obstacles = np.array(obstacles, dtype=int).reshape(-1, 3)
+        self._occupancy = Occupancy(obstacles, self.size)
+        if self._renderer is not None:
+            self._renderer.set_layout(obstacles)
+
+    @property
+    def _obstacles(self):
+        return self._occupancy.obstacles
+
+    @property
+    def _agent_location(self):
+        return self._cell_to_location[self._cells]
+
+    @property
+    def _target_location(self):
+        return self._cell_to_location[self._target_cells]
+
+    def _get_obs(self, cells, target_cells):
+        return {"agent": self._cell_to_location[cells], "target": self._cell_to_location[target_cells]}
+
+    def _get_distance(self, cells, target_cells):
+        return np.abs(self._cell_to_location[cells] - self._cell_to_location[target_cells]).sum(axis=1)
+
+    def reset_wait(self, seed=None, options=None):
+        if seed is not None:
+            self._np_random, seed = seeding.np_random(seed if isinstance(seed, int) else seed[0])
+        if options is not None and "obstacles" in options:
+            self.set_obstacles(options["obstacles"])
+        if self.obstacle_motion is not None:
+            # Only the obstacles that are away from their initial cell are moved back
+            initial = self._initial_obstacles
+            indices = np.flatnonzero(np.any(self._occupancy.obstacles != initial, axis=1))
+            self._occupancy.move(indices, initial[indices])
+            if self._renderer is not None and len(indices):
+                self._renderer.set_layout(self._obstacles)
+            self.obstacle_motion.reset(self._obstacles, self.size, self.np_random)
+        return self.reset_envs(slice(None))
+
+    def reset_envs(self, indices):
+        """
+        Resets only the envs at `indices`, an index array or a slice, and returns their observations and infos.
+        """
+        # Every agent starts in the bottom left corner
+        self._cells[indices] = 0
+        self._steps[indices] = 0
+        cells = self._cells[indices]
+        infos = {
+            "current_state": cells + 1,
+            "distance": self._get_distance(cells, self._target_cells[indices]),
+        }
+        return self._get_obs(cells, self._target_cells[indices]), infos
+
+    def step_async(self, actions):
+        self._actions = np.asarray(actions, dtype=np.int64)
+
+    def step_wait(self):
+        results = self.step_envs(slice(None), self._actions)
+        if self.obstacle_motion is not None:
+            indices, locations = self.obstacle_motion.step(self._occupancy.obstacles)
+            if len(indices):
+                self._occupancy.move(indices, locations)
+                if self._renderer is not None:
+                    self._renderer.set_layout(self._obstacles)
+        return results
+
+    def step_envs(self, indices, actions):
+        """
+        Steps only the envs at `indices`, an index array without duplicates or a slice, with one
+        action each. Results, `final_observation` included, are ordered like `indices`.
+        """
+        cells = self._cells[indices]
+        target_cells = self._target_cells[indices]
+        next_cells = self._move_table[cells, actions]
+
+        # Same precedence as CubeGym.get_reward: obstacle, then wall, then target
+        on_obstacle = self._occupancy.blocked[cells]
+        hit_wall = next_cells < 0
+        failed = on_obstacle | hit_wall
+        reached_goal = ~failed & (next_cells == target_cells)
+        terminated = failed | reached_goal
+
+        rewards = float(self.rewards.step) + self.rewards.proximity * self._occupancy.neighbours[cells]
+        rewards[reached_goal] = self.rewards.goal
+        rewards[failed] = self.rewards.failure
+
+        steps = self._steps[indices] + 1
+        if self.max_episode_steps is None:
+            truncated = np.zeros(len(cells), dtype=bool)
+        else:
+            truncated = ~terminated & (steps >= self.max_episode_steps)
+        done = terminated | truncated
+
+        next_cells = np.where(failed, cells, next_cells)
+        observations = self._get_obs(next_cells, target_cells)
+        infos = {
+            "current_state": cells + 1,
+            "next_state": next_cells + 1,
+            "distance": self._get_distance(next_cells, target_cells),
+            "reached_goal": reached_goal,
+        }
+
+        if done.any():
+            infos["final_observation"] = {key: value.copy() for key, value in observations.items()}
+            infos["_final_observation"] = done
+            next_cells[done] = 0
+            steps[done] = 0
+            observations["agent"][done] = self._cell_to_location[0]
+
+        self._cells[indices] = next_cells
+        self._steps[indices] = steps
+        return observations, rewards, terminated, truncated, infos
+
+    def render(self):
+        # One (N, H, W, 3) batch of frames, painted into a buffer that the next call reuses
+        if self.render_mode == "rgb_array":
+            if self._renderer is None:
+                self._renderer = ArrayRenderer(self.size)
+                self._renderer.set_layout(self._obstacles)
+            return self._renderer.render_batch(self._agent_location, self._target_location)
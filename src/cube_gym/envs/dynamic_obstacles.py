@@ -0,0 +1,44 @@
+import numpy as np
+
+from cube_gym.envs.occupancy import NEIGHBOUR_OFFSETS, in_grid
+
+
+class RandomWalk:
+    """
+    Moves obstacles one cell along a random axis per step, drawn from the env's seeded generator.
+
+    An obstacle motion is what `CubeGym(obstacle_motion=...)` and `CubeGymVector(obstacle_motion=...)`
+    take: `reset(obstacles, size, rng)` starts the trajectories of an episode, and every
+    `step(obstacles)` takes the current (K, 3) obstacle locations and returns the indices and new
+    locations of only the obstacles that moved, which are all the occupancy tables then update.
+    Apart from the generator, no state is kept between steps, so env snapshots stay consistent.
+
+    `moving` is the number of obstacles that move, the first ones of the layout, or a list of
+    their indices; each of them moves with `probability` per step. Moves that would leave the
+    grid are skipped, so an obstacle inside the grid stays inside.
+    """
+
+    def __init__(self, moving=None, probability=1.0):
+        self.moving = moving
+        self.probability = probability
+        self._indices = np.zeros(0, dtype=int)
+
+    def reset(self, obstacles, size, rng):
+        obstacles = np.asarray(obstacles, dtype=int).reshape(-1, 3)
+        if self.moving is None:
+            indices = np.arange(len(obstacles))
+        elif np.ndim(self.moving) == 0:
+            indices = np.arange(min(self.moving, len(obstacles)))
+        else:
+            indices = np.asarray(self.moving, dtype=int)
+        self._indices = indices
+        self._size = size
+        self._rng = rng
+
+    def step(self, obstacles):
+        count = len(self._indices)
+        moves = self._rng.random(count) < self.probability
+        locations = obstacles[self._indices[moves]] + NEIGHBOUR_OFFSETS[self._rng.integers(0, 6, size=count)[moves]]
+        inside = in_grid(locations, self._size)
+        moves[moves] = inside
+        return self._indices[moves], locations[inside]
@@ -0,0 +1,135 @@
+import hashlib
+import json
+import os
+import shutil
+from collections import namedtuple
+
+import numpy as np
+
+from cube_gym.envs.cube_gym import ACTION_SETS, DEFAULT_OBSTACLES
+from cube_gym.envs.occupancy import Occupancy, cell_locations, flat_index, shared_move_table
+from cube_gym.envs.transition_model import DEFAULT_REWARDS, Rewards, TransitionModel, build_transition_model
+
+# Part of every cache key, so tables written by an older layout of the cache are never mapped
+_TABLE_FORMAT = 1
+
+
+class EnvSpec(namedtuple("EnvSpec", ["size", "obstacles", "targets", "actions", "rewards"])):
+    """
+    Everything that determines the derived tables of a CubeGym, as nested tuples of ints.
+
+    Specs are hashable and compare by value, so they work as dict and cache keys, and serialize
+    to compact JSON. Obstacles are sorted, as their order changes none of the tables. Build one
+    with `EnvSpec.create`, or from an existing env with `EnvSpec.from_env`.
+    """
+    __slots__ = ()
+
+    @classmethod
+    def create(cls, size=5, obstacles=None, targets=None, actions="default", rewards=None):
+        if obstacles is None:
+            obstacles = DEFAULT_OBSTACLES
+        if targets is None:
+            targets = [[size - 1] * 3]
+        if isinstance(targets, str):
+            raise ValueError("a spec fixes its targets, random targets are drawn at every reset")
+        if isinstance(actions, str):
+            actions = ACTION_SETS[actions]
+        return cls(
+            size=int(size),
+            obstacles=tuple(sorted(map(tuple, np.asarray(obstacles, dtype=int).reshape(-1, 3).tolist()))),
+            targets=tuple(map(tuple, np.asarray(targets, dtype=int).reshape(-1, 3).tolist())),
+            actions=tuple(map(tuple, np.asarray(actions, dtype=int).reshape(-1, 3).tolist())),
+            rewards=Rewards(*(DEFAULT_REWARDS if rewards is None else rewards)),
+        )
+
+    @classmethod
+    def from_env(cls, env):
+        env = env.unwrapped
+        if env._random_targets:
+            raise ValueError("a spec fixes its targets, random targets are drawn at every reset")
+        directions = [env._action_to_direction[action] for action in range(env.nActions)]
+        return cls.create(env.size, env._initial_obstacles, env._fixed_targets, directions, env.rewards)
+
+    @classmethod
+    def from_json(cls, text):
+        spec = json.loads(text)
+        return cls.create(spec["size"], spec["obstacles"], spec["targets"], spec["actions"], spec["rewards"])
+
+    def to_json(self):
+        return json.dumps({"size": self.size, "obstacles": self.obstacles, "targets": self.targets,
+                           "actions": self.actions, "rewards": self.rewards}, separators=(",", ":"))
+
+    @property
+    def key(self):
+        # Stable across processes and Python versions, unlike `hash`, which is salted for strings
+        return hashlib.sha1(f"{_TABLE_FORMAT}:{self.to_json()}".encode()).hexdigest()[:20]
+
+
+class DerivedTables(namedtuple("DerivedTables", [
+    "blocked", "neighbours", "moves", "locations", "next_state", "reward", "terminated", "reached_goal", "distances"
+])):
+    """
+    The O(size^3) tables of an `EnvSpec`: the occupancy tables, the int32 (cell, action) move table,
+    the location of every cell, the transition model and the distance field to the targets.
+    """
+    __slots__ = ()
+
+    def transition_model(self):
+        return TransitionModel(self.next_state, self.reward, self.terminated, self.reached_goal)
+
+
+def build_tables(spec):
+    # Imported here, as the solvers themselves import from `cube_gym.envs`
+    from cube_gym.solvers.shortest_path import distance_field
+
+    occupancy = Occupancy(spec.obstacles, spec.size)
+    directions = np.array(spec.actions, dtype=int)
+    target_cells = flat_index(np.array(spec.targets, dtype=int), spec.size)
+    model = build_transition_model(occupancy, directions, target_cells, spec.rewards)
+    return DerivedTables(
+        occupancy.blocked,
+        occupancy.neighbours,
+        shared_move_table(spec.size, directions),
+        cell_locations(spec.size),
+        *model,
+        distance_field(occupancy, directions, target_cells),
+    )
+
+
+class TableCache:
+    """
+    Derived tables stored on disk as one directory of .npy files per `EnvSpec`.
+
+    Files are memory-mapped read-only, so hundreds of workers creating the same env with
+    `CubeGym.from_spec` share one copy in the page cache and skip every O(size^3) computation.
+    A directory is written under a temporary name and renamed, so readers never see a partial one.
+    """
+
+    def __init__(self, directory):
+        self.directory = directory
+        os.makedirs(directory, exist_ok=True)
+
+    def path(self, spec):
+        return os.path.join(self.directory, f"tables_size{spec.size}_{spec.key}")
+
+    def get(self, spec):
+        path = self.path(spec)
+        if not os.path.exists(path):
+            self._write(spec, path)
+        return DerivedTables(*(np.load(os.path.join(path, f"{name}.npy"), mmap_mode="r")
+                               for name in DerivedTables._fields))
+
+    def _write(self, spec, path):
+        temporary = path + f".{os.getpid()}.tmp"
+        os.makedirs(temporary, exist_ok=True)
+        for name, table in zip(DerivedTables._fields, build_tables(spec)):
+            np.save(os.path.join(temporary, f"{name}.npy"), table)
+        with open(os.path.join(temporary, "spec.json"), "w") as file:
+            file.write(spec.to_json())
+        try:
+            os.rename(temporary, path)
+        except OSError:
+            # Another process wrote the same tables first
+            shutil.rmtree(temporary, ignore_errors=True)
+            if not os.path.exists(path):
+                raise
@@ -0,0 +1,107 @@
+import os
+
+import numpy as np
+
+from cube_gym.envs.cube_gym import ACTION_DIRECTIONS
+from cube_gym.envs.occupancy import cell_dtype, cell_locations, flat_index, move_table
+
+# Cells and layouts drawn per generation batch, which bound the memory of the random keys and the search
+_BATCH_CELLS = 2 ** 22
+_BATCH_LAYOUTS = 1024
+
+
+def reachable(layouts, size, start, target, directions=ACTION_DIRECTIONS):
+    """
+    Tells for every (L, K) layout of flat obstacle cells whether `target` can be reached from `start`.
+
+    All layouts are searched at once: cell `c` of layout `l` is node `l * size^3 + c` of a single
+    graph, and a backwards breadth-first search from every target runs one array operation per frontier.
+    """
+    layouts = np.asarray(layouts, dtype=np.int64)
+    num_layouts, num_states = len(layouts), size ** 3
+    offsets = np.arange(num_layouts, dtype=np.int64) * num_states
+    directions = np.asarray(directions)
+
+    blocked = np.zeros(num_layouts * num_states, dtype=bool)
+    blocked[(offsets[:, None] + layouts).ravel()] = True
+    visited = np.zeros(num_layouts * num_states, dtype=bool)
+    starts = offsets + flat_index(start, size)
+
+    frontier = offsets + flat_index(target, size)
+    visited[frontier] = True
+    # The cell every action reaches a cell from, or -1 where that would start outside the grid
+    predecessor_table = move_table(size, -directions)
+    while frontier.size and not visited[starts].all():
+        layout, cells = np.divmod(frontier, num_states)
+        predecessors = predecessor_table[cells]
+        nodes = (layout[:, None] * num_states + predecessors)[predecessors >= 0]
+        nodes = nodes[~blocked[nodes] & ~visited[nodes]]
+        frontier = np.unique(nodes)
+        visited[frontier] = True
+    return visited[starts]
+
+
+def generate_layouts(size, density, count, seed=None, start=(0, 0, 0), target=None,
+                     directions=ACTION_DIRECTIONS, max_batches=1000):
+    """
+    Draws `count` seeded obstacle layouts in which `target` is reachable from `start`.
+
+    Each layout blocks `round(density * size^3)` distinct cells, never the start or the target.
+    Layouts are returned as a (count, K) array of sorted flat cell indices; `obstacle_locations`
+    turns one into the (K, 3) locations CubeGym takes.
+    """
+    if target is None:
+        target = [size - 1] * 3
+    num_states = size ** 3
+    num_obstacles = int(round(density * num_states))
+    excluded = np.unique([flat_index(start, size), flat_index(target, size)])
+    if num_obstacles > num_states - len(excluded):
+        raise ValueError(f"a density of {density} leaves no room for the start and the target")
+
+    rng = np.random.default_rng(seed)
+    batch = max(1, min(_BATCH_LAYOUTS, _BATCH_CELLS // num_states))
+    accepted, total = [], 0
+    for _ in range(max_batches):
+        # The K cells with the smallest random keys form a uniformly drawn set of distinct cells
+        keys = rng.random((batch, num_states))
+        keys[:, excluded] = 2.0
+        layouts = np.sort(np.argpartition(keys, num_obstacles, axis=1)[:, :num_obstacles], axis=1)
+        layouts = layouts[reachable(layouts, size, start, target, directions)]
+        accepted.append(layouts.astype(cell_dtype(size)))
+        total += len(layouts)
+        if total >= count:
+            return np.concatenate(accepted)[:count]
+    raise ValueError(f"only {total} of {count} layouts were solvable at a density of {density}")
+
+
+def obstacle_locations(layout, size):
+    return cell_locations(size, np.asarray(layout, dtype=np.int64))
+
+
+class LayoutCache:
+    """
+    Solvable layouts stored on disk as one .npy file of flat cell indices per (size, density, seed).
+
+    Files are memory-mapped read-only, so a curriculum can switch mazes at reset, and many
+    processes can share a cache, without generating or copying layouts again.
+    """
+
+    def __init__(self, directory):
+        self.directory = directory
+        os.makedirs(directory, exist_ok=True)
+
+    def path(self, size, density, seed):
+        return os.path.join(self.directory, f"layouts_size{size}_density{density:g}_seed{seed}.npy")
+
+    def get(self, size, density, seed, count):
+        path = self.path(size, density, seed)
+        if os.path.exists(path):
+            layouts = np.load(path, mmap_mode="r")
+            if len(layouts) >= count:
+                return layouts[:count]
+        # Generation is deterministic per seed, so a larger set extends the smaller one
+        layouts = generate_layouts(size, density, count, seed=seed)
+        temporary = path + f".{os.getpid()}.tmp.npy"
+        np.save(temporary, layouts)
+        os.replace(temporary, path)
+        return np.load(path, mmap_mode="r")
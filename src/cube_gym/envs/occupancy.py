@@ -0,0 +1,274 @@
+import itertools
+from functools import lru_cache
+
+import numpy as np
+
+# The six face-adjacent offsets, i.e. every cell at an L1 distance of 1
+NEIGHBOUR_OFFSETS = np.array([
+    [1, 0, 0],
+    [-1, 0, 0],
+    [0, 1, 0],
+    [0, -1, 0],
+    [0, 0, 1],
+    [0, 0, -1]
+])
+
+# Layouts changed by `move` are identified by a fresh version instead of their obstacle bytes
+_LAYOUT_VERSIONS = itertools.count()
+
+
+def flat_index(locations, size):
+    """
+    Maps integer locations of shape (..., 3) to the flat cell index x + y*size + z*size^2.
+    CubeGym's `current_state` is this index plus one.
+    """
+    locations = np.asarray(locations)
+    return locations[..., 0] + locations[..., 1] * size + locations[..., 2] * size * size
+
+
+def cell_dtype(size):
+    # The smallest unsigned integer type that holds every flat cell index
+    return np.uint16 if size ** 3 <= np.iinfo(np.uint16).max else np.uint32
+
+
+def cell_locations(size, cells=None):
+    """
+    Maps flat cell indices back to (..., 3) locations, by default for every cell of the grid.
+    """
+    if cells is None:
+        cells = np.arange(size ** 3)
+    cells = np.asarray(cells)
+    return np.stack([cells % size, (cells // size) % size, cells // (size * size)], axis=-1)
+
+
+def in_grid(locations, size):
+    locations = np.asarray(locations)
+    return np.all((locations >= 0) & (locations < size), axis=-1)
+
+
+def move_table(size, directions):
+    """
+    Precomputes the cell reached by every (cell, action) pair.
+    Moves that would leave the grid are marked with -1.
+    """
+    locations = cell_locations(size)[:, None, :] + np.asarray(directions)[None, :, :]
+    return np.where(in_grid(locations, size), flat_index(locations, size), -1)
+
+
+def shared_move_table(size, directions):
+    """
+    The int32 `move_table` of (size, directions), built once per process and shared read-only
+    by every env with the same grid and action set.
+    """
+    directions = np.asarray(directions, dtype=np.int32).reshape(-1, 3)
+    return _cached_move_table(int(size), directions.tobytes())
+
+
+@lru_cache(maxsize=8)
+def _cached_move_table(size, directions):
+    directions = np.frombuffer(directions, dtype=np.int32).reshape(-1, 3)
+    # One action at a time in int32, so no (size^3, actions, 3) int64 intermediate is ever held
+    locations = cell_locations(size, np.arange(size ** 3, dtype=np.int32))
+    table = np.empty((size ** 3, len(directions)), dtype=np.int32)
+    for action, direction in enumerate(directions):
+        moved = locations + direction
+        table[:, action] = np.where(in_grid(moved, size), flat_index(moved, size), -1)
+    table.flags.writeable = False
+    return table
+
+
+class Occupancy:
+    """
+    Flat lookup tables over all size^3 cells for a fixed obstacle layout.
+
+    `blocked[cell]` tells whether an obstacle sits on the cell and `neighbours[cell]`
+    counts the obstacles at an L1 distance of 1, duplicates included. Obstacles outside
+    the grid still count towards their in-grid neighbours, just as the per-obstacle loop
+    in `CubeGym.get_reward` does.
+
+    `move` relocates some obstacles and only touches the cells they leave and enter.
+    """
+
+    def __init__(self, obstacles, size):
+        self.size = size
+        self.obstacles = np.asarray(obstacles, dtype=int).reshape(-1, 3)
+        self.blocked = np.zeros(size ** 3, dtype=bool)
+        self.neighbours = np.zeros(size ** 3, dtype=np.int32)
+
+        inside = in_grid(self.obstacles, size)
+        self.blocked[flat_index(self.obstacles[inside], size)] = True
+
+        adjacent = (self.obstacles[:, None, :] + NEIGHBOUR_OFFSETS[None, :, :]).reshape(-1, 3)
+        adjacent = adjacent[in_grid(adjacent, size)]
+        np.add.at(self.neighbours, flat_index(adjacent, size), 1)
+
+        # Identifies the layout, so derived tables can be cached per obstacle set
+        self.key = (size, self.obstacles.tobytes())
+        self._counts = None
+
+    @classmethod
+    def from_tables(cls, obstacles, size, blocked, neighbours):
+        """
+        Wraps precomputed `blocked` and `neighbours` tables of the layout, e.g. read-only memory maps,
+        without computing anything of size^3. `move` copies them first.
+        """
+        occupancy = cls.__new__(cls)
+        occupancy.size = size
+        occupancy.obstacles = np.asarray(obstacles, dtype=int).reshape(-1, 3)
+        occupancy.blocked = blocked
+        occupancy.neighbours = neighbours
+        occupancy.key = (size, occupancy.obstacles.tobytes())
+        occupancy._counts = None
+        return occupancy
+
+    def move(self, indices, locations):
+        """
+        Moves the obstacles at `indices` to `locations`, in time proportional to the number moved.
+        """
+        if self._counts is None:
+            # Obstacles per cell, so a cell left by one of two stacked obstacles stays blocked
+            inside = in_grid(self.obstacles, self.size)
+            cells = flat_index(self.obstacles[inside], self.size)
+            self._counts = np.bincount(cells, minlength=self.size ** 3).astype(np.int32)
+            self.obstacles = self.obstacles.copy()
+            if not self.blocked.flags.writeable or not self.neighbours.flags.writeable:
+                self.blocked, self.neighbours = np.array(self.blocked), np.array(self.neighbours)
+        indices = np.asarray(indices, dtype=int)
+        if not len(indices):
+            return
+        self._update(self.obstacles[indices], -1)
+        self.obstacles[indices] = np.asarray(locations, dtype=int).reshape(-1, 3)
+        self._update(self.obstacles[indices], 1)
+        self.key = (self.size, next(_LAYOUT_VERSIONS))
+
+    def _update(self, obstacles, delta):
+        inside = in_grid(obstacles, self.size)
+        cells = flat_index(obstacles[inside], self.size)
+        np.add.at(self._counts, cells, delta)
+        self.blocked[cells] = self._counts[cells] > 0
+
+        adjacent = (obstacles[:, None, :] + NEIGHBOUR_OFFSETS[None, :, :]).reshape(-1, 3)
+        adjacent = adjacent[in_grid(adjacent, self.size)]
+        np.add.at(self.neighbours, flat_index(adjacent, self.size), delta)
+
+
+class SparseCellTable:
+    """
+    Read-only mapping from flat cell index to value, indexed like the dense (size^3,) arrays of `Occupancy`.
+
+    A single cell is a dict lookup; an array of cells is a binary search over the sorted keys.
+    Cells that are not stored hold `default`.
+    """
+
+    def __init__(self, cells, values, default):
+        order = np.argsort(cells, kind="stable")
+        self.cells = np.asarray(cells, dtype=np.int64)[order]
+        self.values = np.asarray(values)[order]
+        self.default = self.values.dtype.type(default)
+        self._lookup = dict(zip(self.cells.tolist(), self.values.tolist()))
+
+    def __len__(self):
+        return len(self.cells)
+
+    def __getitem__(self, cells):
+        if np.ndim(cells) == 0:
+            return self._lookup.get(int(cells), self.default)
+        cells = np.asarray(cells, dtype=np.int64)
+        if not len(self.cells):
+            return np.full(cells.shape, self.default)
+        positions = np.minimum(np.searchsorted(self.cells, cells), len(self.cells) - 1)
+        found = self.cells[positions] == cells
+        return np.where(found, self.values[positions], self.default)
+
+    def update(self, cells, values):
+        """
+        Sets distinct `cells` to `values`, dropping cells set to `default`, in time linear in the
+        number of stored cells for the sorted arrays and in the number updated for the dict.
+        """
+        cells = np.asarray(cells, dtype=np.int64)
+        values = np.asarray(values, dtype=self.values.dtype)
+        for cell, value in zip(cells.tolist(), values.tolist()):
+            if value == self.default:
+                self._lookup.pop(cell, None)
+            else:
+                self._lookup[cell] = value
+
+        positions = np.searchsorted(self.cells, cells)
+        stored = positions < len(self.cells)
+        stored[stored] = self.cells[positions[stored]] == cells[stored]
+        self.cells = np.delete(self.cells, positions[stored])
+        self.values = np.delete(self.values, positions[stored])
+
+        kept = values != self.default
+        order = np.argsort(cells[kept])
+        cells, values = cells[kept][order], values[kept][order]
+        positions = np.searchsorted(self.cells, cells)
+        self.cells = np.insert(self.cells, positions, cells)
+        self.values = np.insert(self.values, positions, values)
+
+
+class SparseOccupancy:
+    """
+    The `Occupancy` interface for large, sparsely filled cubes: memory scales with the number of
+    obstacles instead of size^3.
+
+    `blocked` and `neighbours` are `SparseCellTable`s keyed by flat cell index, so the same
+    `occupancy.blocked[cell]` and `occupancy.neighbours[cells]` queries work on either backend.
+    """
+
+    def __init__(self, obstacles, size):
+        self.size = size
+        self.obstacles = np.asarray(obstacles, dtype=int).reshape(-1, 3)
+
+        inside = in_grid(self.obstacles, size)
+        blocked = np.unique(flat_index(self.obstacles[inside].astype(np.int64), size))
+        self.blocked = SparseCellTable(blocked, np.ones(len(blocked), dtype=bool), False)
+
+        adjacent = (self.obstacles[:, None, :] + NEIGHBOUR_OFFSETS[None, :, :]).reshape(-1, 3)
+        adjacent = adjacent[in_grid(adjacent, size)]
+        cells, counts = np.unique(flat_index(adjacent.astype(np.int64), size), return_counts=True)
+        self.neighbours = SparseCellTable(cells, counts.astype(np.int32), 0)
+
+        self.key = (size, self.obstacles.tobytes())
+        self._counts = None
+
+    def move(self, indices, locations):
+        """
+        Moves the obstacles at `indices` to `locations`, updating only the cells they leave and enter.
+        """
+        if self._counts is None:
+            # Obstacles per blocked cell, so a cell left by one of two stacked obstacles stays blocked
+            inside = in_grid(self.obstacles, self.size)
+            cells, counts = np.unique(flat_index(self.obstacles[inside].astype(np.int64), self.size), return_counts=True)
+            self._counts = dict(zip(cells.tolist(), counts.tolist()))
+            self.obstacles = self.obstacles.copy()
+        indices = np.asarray(indices, dtype=int)
+        if not len(indices):
+            return
+        left = self.obstacles[indices]
+        self.obstacles[indices] = np.asarray(locations, dtype=int).reshape(-1, 3)
+        entered = self.obstacles[indices]
+
+        changed = set()
+        for obstacles, delta in ((left, -1), (entered, 1)):
+            for cell in flat_index(obstacles[in_grid(obstacles, self.size)].astype(np.int64), self.size).tolist():
+                count = self._counts.get(cell, 0) + delta
+                if count:
+                    self._counts[cell] = count
+                else:
+                    del self._counts[cell]
+                changed.add(cell)
+        changed = np.array(sorted(changed), dtype=np.int64)
+        self.blocked.update(changed, [cell in self._counts for cell in changed.tolist()])
+
+        adjacent = np.concatenate([left, entered])[:, None, :] + NEIGHBOUR_OFFSETS[None, :, :]
+        deltas = np.repeat([-1, 1], len(indices) * len(NEIGHBOUR_OFFSETS))
+        inside = in_grid(adjacent.reshape(-1, 3), self.size)
+        cells, inverse = np.unique(flat_index(adjacent.reshape(-1, 3)[inside].astype(np.int64), self.size),
+                                   return_inverse=True)
+        deltas = np.bincount(inverse, weights=deltas[inside], minlength=len(cells)).astype(np.int64)
+        self.neighbours.update(cells, self.neighbours[cells] + deltas)
+        self.key = (self.size, next(_LAYOUT_VERSIONS))
+
+def make_occupancy(obstacles, size, sparse=False):
+    return SparseOccupancy(obstacles, size) if sparse else Occupancy(obstacles, size)
@@ -0,0 +1,143 @@
+import json
+import sys
+import time
+
+import gym
+
+# The CubeGym methods timed by default, i.e. its hot path and every rendering stage
+PHASES = (
+    "reset",
+    "step",
+    "_fast_step",
+    "get_reward",
+    "_get_info",
+    "_render_frame",
+    "update_window",
+    "update_canvas",
+    "update_xcanvas",
+    "update_ycanvas",
+    "update_zcanvas",
+    "plot_3dview",
+    "render_3d_array",
+)
+
+# Power-of-two nanosecond buckets: bucket b counts calls that took [2^(b-1), 2^b) ns
+HISTOGRAM_BUCKETS = 48
+
+
+class Profiler:
+    """
+    Per-phase call counts, total time and timing histograms for one env and its wrappers.
+
+    `attach` replaces the profiled methods on the instances only, so an env without a
+    profiler runs the plain class methods with no overhead at all. Wrapper layers are timed
+    as `<WrapperClass>.step` and `<WrapperClass>.reset`; every time is inclusive of the calls
+    it makes, so a wrapper's own cost is its time minus that of the layer below it.
+
+    With `dump_every`, `dump` is called with `summary()` after every `dump_every` env steps;
+    by default it writes one JSON line to standard error.
+    """
+
+    def __init__(self, phases=PHASES, dump_every=None, dump=None):
+        self.phases = phases
+        self.dump_every = dump_every
+        self.dump = dump if dump is not None else self._dump_json
+        self.calls = {}
+        self.total_ns = {}
+        self.histograms = {}
+        self._attached = []
+
+    def _dump_json(self, summary):
+        print(json.dumps(summary), file=sys.stderr)
+
+    def reset_counters(self):
+        self.calls.clear()
+        self.total_ns.clear()
+        self.histograms.clear()
+
+    def record(self, phase, elapsed_ns):
+        if phase in self.calls:
+            self.calls[phase] += 1
+            self.total_ns[phase] += elapsed_ns
+        else:
+            self.calls[phase] = 1
+            self.total_ns[phase] = elapsed_ns
+            self.histograms[phase] = [0] * HISTOGRAM_BUCKETS
+        self.histograms[phase][min(elapsed_ns.bit_length(), HISTOGRAM_BUCKETS - 1)] += 1
+
+    def _timed(self, phase, method):
+        record = self.record
+        clock = time.perf_counter_ns
+
+        def timed(*args, **kwargs):
+            start = clock()
+            try:
+                return method(*args, **kwargs)
+            finally:
+                record(phase, clock() - start)
+
+        return timed
+
+    def _instrument(self, instance, name, phase):
+        method = getattr(instance, name, None)
+        if method is None or name in vars(instance):
+            return
+        timed = self._timed(phase, method)
+        if name == "step" and phase == "step" and self.dump_every:
+            timed = self._dumping(timed)
+        setattr(instance, name, timed)
+        self._attached.append((instance, name))
+
+    def _dumping(self, step):
+        def dumping_step(*args, **kwargs):
+            result = step(*args, **kwargs)
+            if self.calls["step"] % self.dump_every == 0:
+                self.dump(self.summary())
+            return result
+
+        return dumping_step
+
+    def attach(self, env):
+        """
+        Instruments `env` and, if it is a wrapper, every layer down to the unwrapped CubeGym.
+        """
+        layer = env
+        while isinstance(layer, gym.Wrapper):
+            for name in ("step", "reset"):
+                self._instrument(layer, name, f"{type(layer).__name__}.{name}")
+            layer = layer.env
+        for name in self.phases:
+            self._instrument(layer, name, name)
+        layer.profiler = self
+        return self
+
+    def detach(self):
+        for instance, name in self._attached:
+            vars(instance).pop(name, None)
+            # Only the unwrapped env holds the attribute; on a wrapper it would be read from the env below
+            if vars(instance).get("profiler") is self:
+                instance.profiler = None
+        self._attached = []
+
+    def percentile_ns(self, phase, fraction):
+        # Upper bound of the histogram bucket holding the given fraction of calls
+        histogram, target = self.histograms[phase], fraction * self.calls[phase]
+        seen = 0
+        for bucket, count in enumerate(histogram):
+            seen += count
+            if seen >= target:
+                return 2 ** bucket
+        return 2 ** (HISTOGRAM_BUCKETS - 1)
+
+    def summary(self):
+        return {
+            phase: {
+                "calls": calls,
+                "total_sec": self.total_ns[phase] / 1e9,
+                "mean_us": self.total_ns[phase] / calls / 1e3,
+                "p50_us": self.percentile_ns(phase, 0.5) / 1e3,
+                "p99_us": self.percentile_ns(phase, 0.99) / 1e3,
+                "histogram_ns": {2 ** bucket: count for bucket, count in enumerate(self.histograms[phase]) if count},
+            }
+            for phase, calls in self.calls.items()
+        }
@@ -0,0 +1,184 @@
+import multiprocessing
+import traceback
+from multiprocessing import shared_memory
+
+import numpy as np
+from gym import spaces
+from gym.vector import VectorEnv
+
+from cube_gym.envs.cube_gym import ACTION_SETS
+from cube_gym.envs.cube_gym_vector import CubeGymVector
+
+# Every batch-wide array the workers share with the main process: (per-env shape, dtype)
+SHARED_ARRAYS = {
+    "actions": ((), np.int64),
+    "agent": ((3,), np.int64),
+    "target": ((3,), np.int64),
+    "final_agent": ((3,), np.int64),
+    "rewards": ((), np.float64),
+    "terminated": ((), np.bool_),
+    "truncated": ((), np.bool_),
+    "reached_goal": ((), np.bool_),
+    "current_state": ((), np.int64),
+    "next_state": ((), np.int64),
+}
+
+
+def _attach(name, shape, dtype):
+    # Workers only borrow the segments; the main process owns and unlinks them. Before Python 3.13
+    # attaching registers the name again with the resource tracker the workers share with the main
+    # process, which is harmless since the tracker keeps a set of names
+    try:
+        memory = shared_memory.SharedMemory(name=name, track=False)
+    except TypeError:
+        memory = shared_memory.SharedMemory(name=name)
+    return memory, np.ndarray(shape, dtype=dtype, buffer=memory.buf)
+
+
+def _worker(pipe, names, num_envs, envs_per_worker, first, env_kwargs):
+    memories, arrays = [], {}
+    for key, (shape, dtype) in SHARED_ARRAYS.items():
+        memory, shared = _attach(names[key], (num_envs,) + shape, dtype)
+        memories.append(memory)
+        arrays[key] = shared[first:first + envs_per_worker]
+    del shared
+
+    env = CubeGymVector(num_envs=envs_per_worker, **env_kwargs)
+    try:
+        while True:
+            command, data = pipe.recv()
+            if command == "step":
+                observations, rewards, terminated, truncated, infos = env.step(arrays["actions"])
+                arrays["rewards"][:] = rewards
+                arrays["terminated"][:] = terminated
+                arrays["truncated"][:] = truncated
+                arrays["reached_goal"][:] = infos["reached_goal"]
+                arrays["current_state"][:] = infos["current_state"]
+                arrays["next_state"][:] = infos["next_state"]
+                arrays["final_agent"][:] = infos.get("final_observation", observations)["agent"]
+            elif command == "reset":
+                observations, infos = env.reset(**data)
+                arrays["current_state"][:] = infos["current_state"]
+            elif command == "close":
+                pipe.send(("ok", None))
+                break
+            arrays["agent"][:] = observations["agent"]
+            arrays["target"][:] = observations["target"]
+            pipe.send(("ok", None))
+    except Exception:
+        pipe.send(("error", traceback.format_exc()))
+    finally:
+        arrays.clear()
+        for memory in memories:
+            memory.close()
+
+
+class CubeGymPool(VectorEnv):
+    """
+    `num_workers` processes, each stepping a CubeGymVector of `envs_per_worker` envs.
+
+    Actions, observations, rewards and done flags live in `multiprocessing.shared_memory`
+    arrays, so nothing is pickled per step: a batch step is one short command to every worker
+    and one acknowledgement back. The returned arrays are views of the shared memory and are
+    overwritten by the next step; copy them to keep them.
+    """
+    metadata = {"render_modes": [], "render_fps": 4}
+
+    def __init__(self, num_workers=1, envs_per_worker=1, context=None, **env_kwargs):
+        size = env_kwargs.get("size", 5)
+        observation_space = spaces.Dict(
+            {
+                "agent": spaces.Box(0, size - 1, shape=(3,), dtype=int),
+                "target": spaces.Box(0, size - 1, shape=(3,), dtype=int),
+            }
+        )
+        # The workers' action set, resolved the same way CubeGymVector resolves it
+        actions = env_kwargs.get("actions", "default")
+        num_actions = len(ACTION_SETS[actions] if isinstance(actions, str) else actions)
+        super().__init__(num_workers * envs_per_worker, observation_space, spaces.Discrete(num_actions))
+
+        self._memories = {}
+        self._arrays = {}
+        for key, (shape, dtype) in SHARED_ARRAYS.items():
+            nbytes = max(1, self.num_envs * int(np.prod(shape, dtype=int)) * np.dtype(dtype).itemsize)
+            memory = shared_memory.SharedMemory(create=True, size=nbytes)
+            self._memories[key] = memory
+            self._arrays[key] = np.ndarray((self.num_envs,) + shape, dtype=dtype, buffer=memory.buf)
+        names = {key: memory.name for key, memory in self._memories.items()}
+
+        context = multiprocessing.get_context(context)
+        self._pipes, self._processes = [], []
+        for worker in range(num_workers):
+            parent, child = context.Pipe()
+            process = context.Process(
+                target=_worker,
+                args=(child, names, self.num_envs, envs_per_worker, worker * envs_per_worker, env_kwargs),
+                daemon=True,
+            )
+            process.start()
+            child.close()
+            self._pipes.append(parent)
+            self._processes.append(process)
+
+    def _command(self, command, data=None):
+        for index, pipe in enumerate(self._pipes):
+            pipe.send((command, data(index) if callable(data) else data))
+
+    def _wait(self):
+        errors = [message for status, message in (pipe.recv() for pipe in self._pipes) if status == "error"]
+        if errors:
+            raise RuntimeError("a CubeGymPool worker failed:\n" + errors[0])
+
+    def _get_obs(self):
+        return {"agent": self._arrays["agent"], "target": self._arrays["target"]}
+
+    def reset_async(self, seed=None, options=None):
+        # Integer seeds are spread over the workers, so no two workers share a seed
+        self._command("reset", lambda index: {
+            "seed": None if seed is None else (seed + index if isinstance(seed, int) else seed[index]),
+            "options": options,
+        })
+
+    def reset_wait(self, seed=None, options=None):
+        self._wait()
+        return self._get_obs(), {"current_state": self._arrays["current_state"]}
+
+    def step_async(self, actions):
+        self._arrays["actions"][:] = actions
+        self._command("step")
+
+    def step_wait(self):
+        self._wait()
+        terminated, truncated = self._arrays["terminated"], self._arrays["truncated"]
+        infos = {
+            "current_state": self._arrays["current_state"],
+            "next_state": self._arrays["next_state"],
+            "reached_goal": self._arrays["reached_goal"],
+        }
+        done = terminated | truncated
+        if done.any():
+            infos["final_observation"] = {"agent": self._arrays["final_agent"], "target": self._arrays["target"]}
+            infos["_final_observation"] = done
+        return self._get_obs(), self._arrays["rewards"], terminated, truncated, infos
+
+    def close_extras(self, **kwargs):
+        for pipe, process in zip(self._pipes, self._processes):
+            if process.is_alive():
+                try:
+                    pipe.send(("close", None))
+                    pipe.recv()
+                except (BrokenPipeError, EOFError):
+                    pass
+            process.join(timeout=5)
+            if process.is_alive():
+                process.terminate()
+            pipe.close()
+        self._arrays = {}
+        for memory in self._memories.values():
+            try:
+                memory.close()
+            except BufferError:
+                # Arrays returned by `step` are still alive; the mapping goes away with them
+                pass
+            memory.unlink()
+        self._memories = {}
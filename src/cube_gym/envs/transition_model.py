@@ -0,0 +1,76 @@
+from collections import namedtuple
+from functools import lru_cache
+
+import numpy as np
+
+from cube_gym.envs.occupancy import Occupancy, flat_index, move_table
+
+# Rewards of a step, added to `proximity` times the adjacent obstacles, of reaching a target and of a collision
+Rewards = namedtuple("Rewards", ["step", "proximity", "goal", "failure"])
+DEFAULT_REWARDS = Rewards(step=-1, proximity=-10, goal=100, failure=-20)
+
+
+class TransitionModel(namedtuple("TransitionModel", ["next_state", "reward", "terminated", "reached_goal"])):
+    """
+    The full deterministic MDP of a CubeGym layout as (nStates, nActions) arrays.
+
+    States are flat cell indices, i.e. `current_state - 1`, both as row index and in
+    `next_state`. `reached_goal` is what `step` returns in `info["reached_goal"]`.
+    """
+    __slots__ = ()
+
+    @property
+    def nStates(self):
+        return self.next_state.shape[0]
+
+    @property
+    def nActions(self):
+        return self.next_state.shape[1]
+
+    def dense(self):
+        # One-hot (nStates, nActions, nStates) transition probabilities, only sensible for small cubes
+        probabilities = np.zeros(self.next_state.shape + (self.nStates,))
+        np.put_along_axis(probabilities, self.next_state[..., None], 1.0, axis=2)
+        return probabilities
+
+
+def build_transition_model(occupancy, directions, target_cells, rewards=DEFAULT_REWARDS):
+    """
+    Evaluates the rules of `CubeGym.get_reward` and `CubeGym.step` for every (state, action) pair at once.
+    """
+    states = np.arange(occupancy.size ** 3)
+    moves = move_table(occupancy.size, directions)
+
+    on_obstacle = occupancy.blocked[:, None]
+    hit_wall = moves < 0
+    failed = on_obstacle | hit_wall
+    reached_goal = ~failed & np.isin(moves, target_cells)
+
+    reward = np.repeat(float(rewards.step) + rewards.proximity * occupancy.neighbours[:, None], moves.shape[1], axis=1)
+    reward[reached_goal] = rewards.goal
+    reward[failed] = rewards.failure
+
+    next_state = np.where(failed, states[:, None], moves)
+    model = TransitionModel(next_state, reward, failed | reached_goal, reached_goal)
+    for table in model:
+        table.flags.writeable = False
+    return model
+
+
+@lru_cache(maxsize=16)
+def _cached_transition_model(size, obstacles, directions, target, rewards):
+    occupancy = Occupancy(np.frombuffer(obstacles, dtype=int), size)
+    directions = np.frombuffer(directions, dtype=int).reshape(-1, 3)
+    target_cells = flat_index(np.frombuffer(target, dtype=int).reshape(-1, 3), size)
+    return build_transition_model(occupancy, directions, target_cells, Rewards(*rewards))
+
+
+def transition_model(size, obstacles, directions, target, rewards=DEFAULT_REWARDS):
+    """
+    Returns the TransitionModel of a layout, cached by size, obstacles, action set, target and rewards.
+    `target` is one location or a (K, 3) array of targets, any of which ends the episode.
+    """
+    obstacles = np.asarray(obstacles, dtype=int).reshape(-1, 3)
+    directions = np.asarray(directions, dtype=int).reshape(-1, 3)
+    target = np.asarray(target, dtype=int).reshape(-1, 3)
+    return _cached_transition_model(size, obstacles.tobytes(), directions.tobytes(), target.tobytes(), tuple(rewards))
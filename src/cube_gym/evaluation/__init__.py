@@ -0,0 +1 @@
+from cube_gym.evaluation.harness import EvaluationReport, evaluate
@@ -0,0 +1,214 @@
+from collections import namedtuple
+
+import numpy as np
+
+from cube_gym.envs.cube_gym import CubeGym
+from cube_gym.envs.occupancy import cell_locations, flat_index
+from cube_gym.envs.transition_model import transition_model
+from cube_gym.solvers.shortest_path import distance_field, shortest_path_lengths
+
+# States evaluated per batch, which bounds the memory of the stacked per-layout tables
+_BATCH_STATES = 2 ** 22
+
+
+class EvaluationReport(namedtuple("EvaluationReport", ["returns", "lengths", "reached_goal", "truncated", "shortest"])):
+    """
+    Per-episode results of `evaluate`, as (num_episodes,) arrays in layout-major, seed-minor order.
+
+    `shortest` is the true shortest path length from the start to the nearest target, or -1 where
+    no target is reachable. Aggregates are properties, and `gaps` is the number of moves an episode
+    took beyond the shortest path, NaN for episodes that did not reach a target.
+    """
+    __slots__ = ()
+
+    @property
+    def num_episodes(self):
+        return len(self.returns)
+
+    @property
+    def success_rate(self):
+        return float(self.reached_goal.mean())
+
+    @property
+    def mean_return(self):
+        return float(self.returns.mean())
+
+    @property
+    def mean_length(self):
+        return float(self.lengths.mean())
+
+    @property
+    def gaps(self):
+        return np.where(self.reached_goal & (self.shortest >= 0), self.lengths - self.shortest, np.nan)
+
+    @property
+    def optimality_gap(self):
+        # Mean extra moves over the successful episodes, or NaN when none succeeded
+        gaps = self.gaps
+        return float(np.nanmean(gaps)) if not np.isnan(gaps).all() else np.nan
+
+    def summary(self):
+        return {
+            "episodes": self.num_episodes,
+            "success_rate": self.success_rate,
+            "mean_return": self.mean_return,
+            "mean_length": self.mean_length,
+            "optimality_gap": self.optimality_gap,
+        }
+
+
+def evaluate(policy, layouts=None, seeds=range(10), size=5, max_episode_steps=None, **env_kwargs):
+    """
+    Rolls out one episode per (layout, seed) pair and returns an `EvaluationReport`.
+
+    `layouts` is a list of (K, 3) obstacle arrays, by default CubeGym's fixed layout; `seeds` seed
+    the reset of every episode, which matters for `targets="random"`. Other keyword arguments,
+    e.g. `actions`, `targets` or `num_targets`, are passed on to CubeGym. Episodes are stepped through
+    one target-free transition model per layout, all at once instead of one env each.
+
+    `policy` is either
+    - an int array of actions indexed by the flat state `current_state - 1`: one (nStates,) table,
+      or one row per layout or per episode, e.g. stacked `solve(env).policy` tables. No Python runs
+      per step: the episodes are followed by pointer doubling, in log2(horizon) array operations.
+    - a callable that maps a batch of observations, a dict of "agent" (N, 3) and "target" (N, 3)
+      or (N, K, 3) arrays as CubeGym observes them, to (N,) actions. It is called once per step
+      for all episodes still running.
+
+    Without `max_episode_steps`, episodes are cut after nStates steps: by then a deterministic
+    policy that has not terminated is stuck in a cycle. Cut episodes count as truncated.
+    """
+    env = CubeGym(size=size, record_info=False, record_path=False, **env_kwargs)
+    if layouts is None:
+        layouts = [env._obstacles]
+    seeds = list(seeds)
+    horizon = env.nStates if max_episode_steps is None else max_episode_steps
+    directions = np.array([env._action_to_direction[action] for action in range(env.nActions)], dtype=int)
+
+    tabular = not callable(policy)
+    if tabular:
+        policy = np.asarray(policy, dtype=np.int64).reshape(-1, env.nStates)
+        if len(policy) not in (1, len(layouts), len(layouts) * len(seeds)):
+            raise ValueError(f"a tabular policy needs 1, {len(layouts)} or {len(layouts) * len(seeds)} rows, "
+                             f"got {len(policy)}")
+
+    # One group per distinct (layout, targets, policy row), sharing the target-free model of its layout
+    groups, keys, episode_groups, starts, shortest = [], {}, [], [], []
+    for layout_index, layout in enumerate(layouts):
+        env.set_obstacles(layout)
+        base = transition_model(size, env._obstacles, directions, np.zeros((0, 3), dtype=int), env.rewards)
+        from_start = {}
+        for seed in seeds:
+            env.reset(seed=seed)
+            start = int(flat_index(env._agent_location, size))
+            target_cells = flat_index(env._target_locations, size)
+            row = 0
+            if tabular and len(policy) > 1:
+                row = layout_index if len(policy) == len(layouts) else len(episode_groups)
+            key = (layout_index, target_cells.tobytes(), row)
+            if key not in keys:
+                keys[key] = len(groups)
+                groups.append((base, target_cells, env._target_location.copy(), row))
+            episode_groups.append(keys[key])
+            starts.append(start)
+
+            if env._occupancy.blocked[start] or env._occupancy.blocked[target_cells].any():
+                shortest.append(shortest_path_lengths(size, env._obstacles, directions, env._target_locations)[start])
+                continue
+            # Between free cells, one forward search from the start serves every target drawn on the layout
+            if start not in from_start:
+                from_start[start] = distance_field(env._occupancy, -directions, [start])
+            distances = from_start[start][target_cells]
+            shortest.append(distances[distances >= 0].min() if (distances >= 0).any() else -1)
+    episode_groups, starts = np.array(episode_groups), np.array(starts)
+
+    num_episodes = len(episode_groups)
+    returns = np.zeros(num_episodes)
+    lengths = np.zeros(num_episodes, dtype=np.int64)
+    reached_goal = np.zeros(num_episodes, dtype=bool)
+    truncated = np.zeros(num_episodes, dtype=bool)
+    rollout = _tabular_rollout if tabular else _batched_rollout
+    batch = max(1, _BATCH_STATES // env.nStates)
+    for first in range(0, len(groups), batch):
+        episodes = np.flatnonzero((episode_groups >= first) & (episode_groups < first + batch))
+        results = rollout(policy, groups[first:first + batch], episode_groups[episodes] - first,
+                          starts[episodes], horizon, size, env.rewards)
+        returns[episodes], lengths[episodes], reached_goal[episodes], truncated[episodes] = results
+    return EvaluationReport(returns, lengths, reached_goal, truncated, np.array(shortest, dtype=np.int64))
+
+
+def _reached_targets(model, states, actions, target_cells):
+    # The target rules of `build_transition_model`, applied to a model built without targets
+    return ~model.terminated[states, actions] & np.isin(model.next_state[states, actions], target_cells)
+
+
+def _tabular_rollout(policy, groups, episode_groups, starts, horizon, size, rewards):
+    """
+    Follows a fixed policy from every start for up to `horizon` steps, by repeatedly squaring the
+    successor map: node `g * nStates + s` is state `s` of group `g`, and one extra absorbing node
+    stands for every finished episode.
+    """
+    num_states = size ** 3
+    sink = len(groups) * num_states
+    jump = np.full(sink + 1, sink, dtype=np.int64)
+    reward = np.zeros(sink + 1)
+    steps = np.zeros(sink + 1, dtype=np.int64)
+    goal = np.zeros(sink + 1, dtype=bool)
+    states = np.arange(num_states)
+    for index, (model, target_cells, _, row) in enumerate(groups):
+        actions = policy[row]
+        nodes = slice(index * num_states, (index + 1) * num_states)
+        reached = _reached_targets(model, states, actions, target_cells)
+        finished = model.terminated[states, actions] | reached
+        jump[nodes] = np.where(finished, sink, index * num_states + model.next_state[states, actions])
+        reward[nodes] = np.where(reached, rewards.goal, model.reward[states, actions])
+        steps[nodes] = 1
+        goal[nodes] = reached
+
+    # The tables always describe 2^bit steps from a node; the set bits of the horizon add up to it
+    position = episode_groups * num_states + starts
+    returns = np.zeros(len(position))
+    lengths = np.zeros(len(position), dtype=np.int64)
+    reached_goal = np.zeros(len(position), dtype=bool)
+    for bit in range(horizon.bit_length()):
+        if horizon >> bit & 1:
+            returns += reward[position]
+            lengths += steps[position]
+            reached_goal |= goal[position]
+            position = jump[position]
+        if horizon >> (bit + 1):
+            reward = reward + reward[jump]
+            steps = steps + steps[jump]
+            goal = goal | goal[jump]
+            jump = jump[jump]
+    return returns, lengths, reached_goal, position != sink
+
+
+def _batched_rollout(policy, groups, episode_groups, starts, horizon, size, rewards):
+    num_states = size ** 3
+    states, actions = np.arange(num_states)[:, None], np.arange(groups[0][0].nActions)[None, :]
+    goal = np.concatenate([_reached_targets(model, states, actions, cells) for model, cells, *_ in groups])
+    next_state = np.concatenate([model.next_state for model, *_ in groups])
+    reward = np.where(goal, rewards.goal, np.concatenate([model.reward for model, *_ in groups]))
+    terminated = goal | np.concatenate([model.terminated for model, *_ in groups])
+    targets = np.stack([target for _, _, target, *_ in groups])[episode_groups]
+    locations = cell_locations(size)
+
+    offsets = episode_groups * num_states
+    states = starts.copy()
+    returns = np.zeros(len(states))
+    lengths = np.zeros(len(states), dtype=np.int64)
+    reached_goal = np.zeros(len(states), dtype=bool)
+    running = np.arange(len(states))
+    for _ in range(horizon):
+        if not len(running):
+            break
+        actions = np.asarray(policy({"agent": locations[states[running]], "target": targets[running]}))
+        nodes = offsets[running] + states[running]
+        returns[running] += reward[nodes, actions]
+        lengths[running] += 1
+        reached_goal[running] = goal[nodes, actions]
+        states[running] = next_state[nodes, actions]
+        running = running[~terminated[nodes, actions]]
+    truncated = np.zeros(len(states), dtype=bool)
+    truncated[running] = True
+    return returns, lengths, reached_goal, truncated
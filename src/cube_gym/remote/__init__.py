@@ -0,0 +1,3 @@
+from cube_gym.remote.client import EnvClient
+from cube_gym.remote.protocol import RemoteEnvError
+from cube_gym.remote.server import EnvServer
@@ -0,0 +1,70 @@
+import asyncio
+
+from cube_gym.remote import protocol
+
+
+class EnvClient:
+    """
+    asyncio client of an `EnvServer`: one connection, owning the envs it allocates.
+
+    Observations and infos come back batched, in the order of the env ids of the request,
+    in the same layout as CubeGymVector returns them.
+    """
+
+    def __init__(self, reader, writer):
+        self._reader = reader
+        self._writer = writer
+        self._lock = asyncio.Lock()
+
+    @classmethod
+    async def connect(cls, path=None, host="127.0.0.1", port=None):
+        if path is not None:
+            reader, writer = await asyncio.open_unix_connection(path)
+        else:
+            reader, writer = await asyncio.open_connection(host, port)
+        return cls(reader, writer)
+
+    async def _request(self, message, dtype):
+        # One request in flight per connection, so responses cannot be matched to the wrong caller
+        async with self._lock:
+            self._writer.write(message)
+            await self._writer.drain()
+            return await protocol.read_response(self._reader, dtype)
+
+    @staticmethod
+    def _reset_result(records):
+        observations = {"agent": records["agent"].astype(int), "target": records["target"].astype(int)}
+        return records["env_id"].astype(int), observations
+
+    async def allocate(self, count):
+        """
+        Claims `count` envs, already reset; returns their ids and observations.
+        """
+        records = await self._request(protocol.encode_request(protocol.ALLOCATE, count=count), protocol.RESET_RECORD)
+        return self._reset_result(records)
+
+    async def reset(self, env_ids):
+        records = await self._request(protocol.encode_request(protocol.RESET, env_ids), protocol.RESET_RECORD)
+        return self._reset_result(records)[1], {}
+
+    async def step(self, env_ids, actions):
+        records = await self._request(protocol.encode_request(protocol.STEP, env_ids, actions), protocol.STEP_RECORD)
+        flags = records["flags"]
+        terminated = (flags & protocol.TERMINATED) > 0
+        truncated = (flags & protocol.TRUNCATED) > 0
+        observations = {"agent": records["agent"].astype(int), "target": records["target"].astype(int)}
+        infos = {"reached_goal": (flags & protocol.REACHED_GOAL) > 0}
+        done = terminated | truncated
+        if done.any():
+            infos["final_observation"] = {"agent": records["final_agent"].astype(int), "target": observations["target"]}
+            infos["_final_observation"] = done
+        return observations, records["reward"].astype(float), terminated, truncated, infos
+
+    async def close(self):
+        try:
+            self._writer.write(protocol.encode_request(protocol.CLOSE, count=0))
+            await self._writer.drain()
+        except ConnectionError:
+            pass
+        self._writer.close()
+        await self._writer.wait_closed()
@@ -0,0 +1,66 @@
+"""
+The binary protocol spoken between `EnvServer` and `EnvClient`, all little-endian.
+
+Every message starts with a 5-byte header: a uint8 code and a uint32 count. Requests use an
+operation code and, apart from CLOSE, a count of envs; the payload is that many uint32 env ids,
+followed by as many uint8 actions for a STEP. ALLOCATE has no payload and asks for `count` new
+envs. Responses use a status code and a count of records: OK is followed by `count` fixed-size
+records, ERROR by a UTF-8 message of `count` bytes.
+"""
+import struct
+
+import numpy as np
+
+HEADER = struct.Struct("<BI")
+
+ALLOCATE, RESET, STEP, CLOSE = range(4)
+OK, ERROR = range(2)
+
+ENV_ID = np.dtype("<u4")
+ACTION = np.dtype("u1")
+
+# Bits of the `flags` field of a step record
+TERMINATED, TRUNCATED, REACHED_GOAL = 1, 2, 4
+
+RESET_RECORD = np.dtype([
+    ("env_id", "<u4"),
+    ("agent", "<i4", (3,)),
+    ("target", "<i4", (3,)),
+])
+
+# `final_agent` is the location an episode ended at; the env itself has already been reset
+STEP_RECORD = np.dtype([
+    ("agent", "<i4", (3,)),
+    ("target", "<i4", (3,)),
+    ("final_agent", "<i4", (3,)),
+    ("reward", "<f4"),
+    ("flags", "u1"),
+])
+
+
+class RemoteEnvError(RuntimeError):
+    pass
+
+
+def encode_request(operation, env_ids=(), actions=None, count=None):
+    env_ids = np.asarray(env_ids, dtype=ENV_ID)
+    header = HEADER.pack(operation, len(env_ids) if count is None else count)
+    if actions is None:
+        return header + env_ids.tobytes()
+    return header + env_ids.tobytes() + np.asarray(actions, dtype=ACTION).tobytes()
+
+
+def encode_records(records):
+    return HEADER.pack(OK, len(records)) + records.tobytes()
+
+
+def encode_error(message):
+    message = message.encode()
+    return HEADER.pack(ERROR, len(message)) + message
+
+
+async def read_response(reader, dtype):
+    status, count = HEADER.unpack(await reader.readexactly(HEADER.size))
+    if status == ERROR:
+        raise RemoteEnvError((await reader.readexactly(count)).decode())
+    return np.frombuffer(await reader.readexactly(count * dtype.itemsize), dtype=dtype)
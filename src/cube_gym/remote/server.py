@@ -0,0 +1,181 @@
+import asyncio
+import itertools
+
+import numpy as np
+
+from cube_gym.envs.cube_gym_vector import CubeGymVector
+from cube_gym.remote import protocol
+
+
+class EnvServer:
+    """
+    Hosts `num_envs` CubeGym instances in one process, as a single CubeGymVector, for remote actors.
+
+    Clients allocate envs by id and send batched RESET and STEP requests. Requests that arrive
+    together are not served one by one: they are queued, and once the event loop has read every
+    ready socket, all queued steps run as one `step_envs` call over the union of their env ids.
+    A request touching an env that is already part of the batch waits for the next one.
+    `max_delay` seconds, if set, are waited before every batch to let more requests gather.
+    """
+
+    def __init__(self, num_envs=1024, max_delay=0.0, **env_kwargs):
+        self.env = CubeGymVector(num_envs=num_envs, **env_kwargs)
+        self.env.reset()
+        self.max_delay = max_delay
+        self.batches = 0
+        self.requests = 0
+
+        self._owners = np.full(num_envs, -1, dtype=np.int64)
+        self._client_ids = itertools.count()
+        self._pending = []
+        self._scheduled = False
+        self._server = None
+
+    async def start(self, path=None, host="127.0.0.1", port=0, backlog=4096):
+        """
+        Listens on the Unix socket `path` or, without one, on TCP `host:port`; returns the server.
+        The large default `backlog` lets thousands of actors connect at once.
+        """
+        if path is not None:
+            self._server = await asyncio.start_unix_server(self._serve, path=path, backlog=backlog)
+        else:
+            self._server = await asyncio.start_server(self._serve, host=host, port=port, backlog=backlog)
+        return self._server
+
+    async def close(self):
+        if self._server is not None:
+            self._server.close()
+            await self._server.wait_closed()
+            self._server = None
+
+    async def _serve(self, reader, writer):
+        client = next(self._client_ids)
+        try:
+            while True:
+                try:
+                    header = await reader.readexactly(protocol.HEADER.size)
+                except asyncio.IncompleteReadError:
+                    break
+                operation, count = protocol.HEADER.unpack(header)
+                if operation == protocol.CLOSE:
+                    break
+                writer.write(await self._handle(client, operation, count, reader))
+                await writer.drain()
+        except (ConnectionError, asyncio.IncompleteReadError):
+            # The client went away, possibly in the middle of a request's payload
+            pass
+        finally:
+            self._owners[self._owners == client] = -1
+            writer.close()
+
+    async def _handle(self, client, operation, count, reader):
+        if operation == protocol.ALLOCATE:
+            return self._allocate(client, count)
+        env_ids = np.frombuffer(await reader.readexactly(count * protocol.ENV_ID.itemsize),
+                                dtype=protocol.ENV_ID).astype(np.int64)
+        actions = None
+        if operation == protocol.STEP:
+            actions = np.frombuffer(await reader.readexactly(count), dtype=protocol.ACTION).astype(np.int64)
+        error = self._validate(client, operation, env_ids, actions)
+        if error is not None:
+            return protocol.encode_error(error)
+        response = asyncio.get_running_loop().create_future()
+        self._enqueue(operation, env_ids, actions, response)
+        try:
+            return await response
+        except Exception as exception:
+            return protocol.encode_error(f"{type(exception).__name__}: {exception}")
+
+    def _allocate(self, client, count):
+        free = np.flatnonzero(self._owners < 0)
+        if count > len(free):
+            return protocol.encode_error(f"{count} envs requested, {len(free)} free")
+        env_ids = free[:count]
+        self._owners[env_ids] = client
+        observations, _ = self.env.reset_envs(env_ids)
+        return self._reset_response(env_ids, observations)
+
+    def _validate(self, client, operation, env_ids, actions):
+        if operation not in (protocol.RESET, protocol.STEP):
+            return f"unknown operation {operation}"
+        if np.any(env_ids >= len(self._owners)) or np.any(self._owners[env_ids] != client):
+            return "env ids have to be allocated by this client"
+        if len(np.unique(env_ids)) != len(env_ids):
+            return "env ids have to be distinct"
+        if actions is not None and np.any(actions >= self.env.nActions):
+            return f"actions have to be below {self.env.nActions}"
+        return None
+
+    def _enqueue(self, operation, env_ids, actions, response):
+        self._pending.append((operation, env_ids, actions, response))
+        self.requests += 1
+        if not self._scheduled:
+            self._scheduled = True
+            loop = asyncio.get_running_loop()
+            # call_soon runs after the callbacks already queued, i.e. after every socket that is ready
+            if self.max_delay:
+                loop.call_later(self.max_delay, self._flush)
+            else:
+                loop.call_soon(self._flush)
+
+    def _flush(self):
+        self._scheduled = False
+        pending, self._pending = self._pending, []
+        while pending:
+            pending = self._run_batch(pending)
+
+    def _run_batch(self, pending):
+        # Takes every request whose envs are not in the batch yet and defers the others
+        in_batch = np.zeros(len(self._owners), dtype=bool)
+        batch, deferred = [], []
+        for request in pending:
+            if in_batch[request[1]].any():
+                deferred.append(request)
+            else:
+                in_batch[request[1]] = True
+                batch.append(request)
+        self.batches += 1
+
+        resets = [request for request in batch if request[0] == protocol.RESET]
+        steps = [request for request in batch if request[0] == protocol.STEP]
+        try:
+            if resets:
+                env_ids = np.concatenate([request[1] for request in resets])
+                observations, _ = self.env.reset_envs(env_ids)
+                self._respond(resets, self._reset_records(env_ids, observations))
+            if steps:
+                env_ids = np.concatenate([request[1] for request in steps])
+                actions = np.concatenate([request[2] for request in steps])
+                self._respond(steps, self._step_records(*self.env.step_envs(env_ids, actions)))
+        except Exception as exception:
+            for request in batch:
+                if not request[3].done():
+                    request[3].set_exception(exception)
+        return deferred
+
+    def _respond(self, requests, records):
+        offsets = np.cumsum([len(request[1]) for request in requests])[:-1]
+        for request, chunk in zip(requests, np.split(records, offsets)):
+            if not request[3].done():
+                request[3].set_result(protocol.encode_records(chunk))
+
+    def _reset_records(self, env_ids, observations):
+        records = np.empty(len(env_ids), dtype=protocol.RESET_RECORD)
+        records["env_id"] = env_ids
+        records["agent"] = observations["agent"]
+        records["target"] = observations["target"]
+        return records
+
+    def _reset_response(self, env_ids, observations):
+        return protocol.encode_records(self._reset_records(env_ids, observations))
+
+    def _step_records(self, observations, rewards, terminated, truncated, infos):
+        records = np.empty(len(rewards), dtype=protocol.STEP_RECORD)
+        records["agent"] = observations["agent"]
+        records["target"] = observations["target"]
+        records["final_agent"] = infos["final_observation"]["agent"] if "final_observation" in infos \
+            else observations["agent"]
+        records["reward"] = rewards
+        records["flags"] = (terminated * protocol.TERMINATED + truncated * protocol.TRUNCATED
+                            + infos["reached_goal"] * protocol.REACHED_GOAL)
+        return records
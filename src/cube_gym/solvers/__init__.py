@@ -0,0 +1,2 @@
+from cube_gym.solvers.shortest_path import distance_field, shortest_path_lengths
+from cube_gym.solvers.value_iteration import Solution, solve, value_iteration
\ No newline at end of file
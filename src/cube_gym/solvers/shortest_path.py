@@ -0,0 +1,51 @@
+from functools import lru_cache
+
+import numpy as np
+
+from cube_gym.envs.occupancy import Occupancy, cell_locations, flat_index, in_grid
+
+
+def distance_field(occupancy, directions, target_cells):
+    """
+    Number of moves from every cell to the nearest target cell, or -1 where no target is reachable.
+
+    Runs a breadth-first search backwards from the targets, one array operation per frontier.
+    Obstacles are never entered, since `CubeGym` ends the episode on the step after an agent
+    lands on one, but a target may sit on an obstacle.
+    """
+    size = occupancy.size
+    directions = np.asarray(directions)
+    distances = np.full(size ** 3, -1, dtype=np.int32)
+
+    frontier = np.unique(np.asarray(target_cells).reshape(-1))
+    distances[frontier] = 0
+    depth = 0
+    while frontier.size:
+        depth += 1
+        # Every cell that reaches a frontier cell with a single action
+        predecessors = (cell_locations(size, frontier)[:, None, :] - directions[None, :, :]).reshape(-1, 3)
+        predecessors = flat_index(predecessors[in_grid(predecessors, size)], size)
+        predecessors = predecessors[~occupancy.blocked[predecessors] & (distances[predecessors] < 0)]
+        frontier = np.unique(predecessors)
+        distances[frontier] = depth
+    return distances
+
+
+@lru_cache(maxsize=16)
+def _cached_distance_field(size, obstacles, directions, targets):
+    occupancy = Occupancy(np.frombuffer(obstacles, dtype=int), size)
+    directions = np.frombuffer(directions, dtype=int).reshape(-1, 3)
+    target_cells = flat_index(np.frombuffer(targets, dtype=int).reshape(-1, 3), size)
+    distances = distance_field(occupancy, directions, target_cells)
+    distances.flags.writeable = False
+    return distances
+
+
+def shortest_path_lengths(size, obstacles, directions, targets):
+    """
+    Returns the distance field of a layout, cached by size, obstacles, action set and targets.
+    """
+    obstacles = np.asarray(obstacles, dtype=int).reshape(-1, 3)
+    directions = np.asarray(directions, dtype=int).reshape(-1, 3)
+    targets = np.asarray(targets, dtype=int).reshape(-1, 3)
+    return _cached_distance_field(size, obstacles.tobytes(), directions.tobytes(), targets.tobytes())
@@ -0,0 +1,65 @@
+from collections import OrderedDict, namedtuple
+
+import numpy as np
+
+# Solutions of the most recently solved (layout, actions, target, rewards, gamma) keys, oldest first
+_MAX_SOLUTIONS = 16
+_solutions = OrderedDict()
+
+Solution = namedtuple("Solution", ["values", "policy", "distances"])
+
+
+def value_iteration(model, gamma=1.0, tol=1e-6, max_iterations=None):
+    """
+    Runs synchronous Bellman sweeps over a TransitionModel until the values change by less than `tol`.
+    Returns the optimal values and the greedy policy, both indexed by `current_state - 1`.
+    """
+    if max_iterations is None:
+        max_iterations = 10 * model.nStates
+    # One contiguous row per action keeps each sweep to a few gathers into reused buffers
+    next_state = np.ascontiguousarray(model.next_state.T)
+    reward = np.ascontiguousarray(model.reward.T)
+    continuing = np.ascontiguousarray(gamma * ~model.terminated.T)
+
+    values = np.zeros(model.nStates)
+    new_values = np.empty(model.nStates)
+    q_value = np.empty(model.nStates)
+    for _ in range(max_iterations):
+        new_values.fill(-np.inf)
+        for action in range(model.nActions):
+            np.take(values, next_state[action], out=q_value)
+            q_value *= continuing[action]
+            q_value += reward[action]
+            np.maximum(new_values, q_value, out=new_values)
+        converged = np.abs(new_values - values).max() < tol
+        values, new_values = new_values, values
+        if converged:
+            break
+    q_values = model.reward + gamma * ~model.terminated * values[model.next_state]
+    return values, q_values.argmax(axis=1)
+
+
+def solve(env, gamma=1.0):
+    """
+    Optimal values, greedy policy and shortest path lengths for the current layout of a CubeGym.
+
+    All three are (nStates,) arrays indexed by `current_state - 1`; unreachable cells have a
+    path length of -1. Results are cached per obstacle layout, action set, target, rewards and `gamma`.
+    """
+    env = env.unwrapped
+    obstacles = np.asarray(env._obstacles, dtype=int).reshape(-1, 3)
+    directions = np.array([env._action_to_direction[action] for action in range(env.nActions)], dtype=int)
+    target = np.asarray(env._target_locations, dtype=int)
+    key = (env.size, obstacles.tobytes(), directions.tobytes(), target.tobytes(), tuple(env.rewards), gamma)
+    if key in _solutions:
+        _solutions.move_to_end(key)
+    else:
+        # The env's own model, so warm-started envs solve their mapped tables instead of rebuilding them
+        values, policy = value_iteration(env.transition_model(), gamma)
+        for table in (values, policy):
+            table.flags.writeable = False
+        _solutions[key] = (values, policy)
+        if len(_solutions) > _MAX_SOLUTIONS:
+            _solutions.popitem(last=False)
+    values, policy = _solutions[key]
+    return Solution(values, policy, env.distance_field())
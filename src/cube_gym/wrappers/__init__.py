@@ -1,4 +1,10 @@
 from cube_gym.wrappers.clip_reward import ClipReward
 from cube_gym.wrappers.discrete_actions import DiscreteActions
+from cube_gym.wrappers.obstacle_observations import LocalOccupancy, ObstacleDistance, OneHotState
+from cube_gym.wrappers.potential_shaping import PotentialShaping
 from cube_gym.wrappers.reacher_weighted_reward import ReacherRewardWrapper
 from cube_gym.wrappers.relative_position import RelativePosition
+from cube_gym.wrappers.trajectory_recorder import TrajectoryDataset, TrajectoryRecorder
+from cube_gym.wrappers.vector import (
+    VectorClipReward, VectorDiscreteActions, VectorRelativePosition, VectorRewardWeight, VectorWeightedReward
+)
@@ -0,0 +1,135 @@
+import gym
+from gym.spaces import Box, Dict
+import numpy as np
+
+from cube_gym.envs.occupancy import SparseOccupancy, cell_locations, flat_index, in_grid, shared_move_table
+
+
+class _LayoutObservation(gym.ObservationWrapper):
+    """
+    Adds one entry to the dict observation, read from tables built once per obstacle layout.
+
+    The tables are rebuilt only when the env's `Occupancy` is replaced, e.g. by
+    `set_obstacles` or `reset(options={"obstacles": ...})`; every other step is a lookup.
+    """
+    key = None
+
+    def __init__(self, env, space):
+        super().__init__(env)
+        self.observation_space = Dict(dict(env.observation_space.spaces, **{self.key: space}))
+        self._layout_key = None
+
+    def _tables(self):
+        occupancy = self.env.unwrapped._occupancy
+        if occupancy.key is not self._layout_key:
+            self.build(occupancy)
+            self._layout_key = occupancy.key
+
+    def build(self, occupancy):
+        raise NotImplementedError
+
+    def encode(self, agent):
+        raise NotImplementedError
+
+    def observation(self, obs):
+        self._tables()
+        return dict(obs, **{self.key: self.encode(obs["agent"])})
+
+
+class LocalOccupancy(_LayoutObservation):
+    """
+    The k x k x k block of cells centred on the agent, indexed [x, y, z]: 1 for an obstacle or
+    for a cell outside the grid, which ends an episode just the same, and 0 for a free cell.
+    """
+    key = "occupancy"
+
+    def __init__(self, env, k=3):
+        if k % 2 == 0:
+            raise ValueError("k has to be odd to centre the patch on the agent")
+        self.k = k
+        super().__init__(env, Box(0, 1, shape=(k, k, k), dtype=np.int8))
+
+    def build(self, occupancy):
+        radius = self.k // 2
+        self._occupancy = occupancy
+        if isinstance(occupancy, SparseOccupancy):
+            # No dense grid to slice: the k^3 cells are looked up in the sparse table every step
+            self._grid = None
+            self._offsets = cell_locations(self.k).reshape(self.k, self.k, self.k, 3).transpose(2, 1, 0, 3) - radius
+            return
+        # A [x, y, z] view of the live table, so obstacles moved in place need no copy of the grid
+        size = occupancy.size
+        self._grid = occupancy.blocked.reshape(size, size, size).transpose(2, 1, 0)
+
+    def encode(self, agent):
+        if self._grid is None:
+            cells = agent + self._offsets
+            inside = in_grid(cells, self._occupancy.size)
+            patch = np.ones(inside.shape, dtype=np.int8)
+            patch[inside] = self._occupancy.blocked[flat_index(cells[inside], self._occupancy.size)]
+            return patch
+        # Cells outside the grid stay 1; the part of the patch inside it is one slice of the grid
+        corner = np.asarray(agent) - self.k // 2
+        lower, upper = np.maximum(corner, 0), np.minimum(corner + self.k, self._occupancy.size)
+        patch = np.ones((self.k, self.k, self.k), dtype=np.int8)
+        if np.all(upper > lower):
+            start, stop = lower - corner, upper - corner
+            patch[start[0]:stop[0], start[1]:stop[1], start[2]:stop[2]] = \
+                self._grid[lower[0]:upper[0], lower[1]:upper[1], lower[2]:upper[2]]
+        return patch
+
+
+class ObstacleDistance(_LayoutObservation):
+    """
+    For every action, how many moves the agent can repeat it before the next move would put it
+    on an obstacle or outside the grid.
+    """
+    key = "obstacle_distance"
+
+    def __init__(self, env):
+        unwrapped = env.unwrapped
+        self._directions = np.array([unwrapped._action_to_direction[action] for action in range(unwrapped.nActions)])
+        size = unwrapped.size
+        self._moves = None
+        super().__init__(env, Box(0, size - 1, shape=(len(self._directions),), dtype=int))
+
+    def build(self, occupancy):
+        size = occupancy.size
+        # The move table only depends on the size and the actions, so layout swaps reuse it
+        if self._moves is None or len(self._moves) != size ** 3:
+            self._moves = shared_move_table(size, self._directions)
+        moves = self._moves
+        stops = moves < 0
+        stops[~stops] = occupancy.blocked[moves[~stops]]
+        # Pointer doubling over the runs of each action: after r rounds `distances` counts the free moves
+        # among the next 2^r, and `jump` is the cell they reach, or an absorbing extra cell after a stop
+        num_states = size ** 3
+        rounds = int(np.ceil(np.log2(max(size - 1, 1))))  # No run is longer than size - 1 moves
+        distances = np.empty(moves.shape, dtype=int)
+        for action in range(moves.shape[1]):
+            jump = np.append(np.where(stops[:, action], num_states, moves[:, action]), num_states)
+            counts = np.append(~stops[:, action], False).astype(np.int32)
+            for _ in range(rounds):
+                counts += counts[jump]
+                jump = jump[jump]
+            distances[:, action] = counts[:num_states]
+        distances.flags.writeable = False
+        self._distances = distances
+
+    def encode(self, agent):
+        return self._distances[flat_index(agent, self.env.unwrapped.size)]
+
+
+class OneHotState(gym.ObservationWrapper):
+    """
+    Replaces the observation by a one-hot vector over the size^3 flat cells, set at `current_state - 1`.
+    """
+
+    def __init__(self, env):
+        super().__init__(env)
+        self.observation_space = Box(0, 1, shape=(env.unwrapped.size ** 3,), dtype=np.float32)
+
+    def observation(self, obs):
+        encoding = np.zeros(self.observation_space.shape, dtype=np.float32)
+        encoding[flat_index(obs["agent"], self.env.unwrapped.size)] = 1
+        return encoding
@@ -0,0 +1,126 @@
+import glob
+import json
+import os
+
+import gym
+import numpy as np
+
+from cube_gym.envs.occupancy import cell_dtype
+
+
+def transition_dtype(size):
+    # States are flat cell indices (`current_state - 1`), so small integer types suffice
+    state = cell_dtype(size)
+    return np.dtype([
+        ("state", state),
+        ("action", np.uint8),
+        ("reward", np.float32),
+        ("next_state", state),
+        ("terminated", np.bool_),
+    ])
+
+
+class TrajectoryRecorder(gym.Wrapper):
+    """
+    Streams every (state, action, reward, next_state, terminated) transition to fixed-width binary chunks.
+
+    Transitions are collected in a preallocated buffer of `buffer_size` records and appended to
+    `transitions_<n>.bin` whenever it fills up, so memory stays bounded however long the recording
+    runs. A new chunk file is started every `chunk_size` records. Recording into a directory that
+    already holds chunks continues after them. Read the data back with `TrajectoryDataset`.
+    """
+
+    def __init__(self, env, directory, chunk_size=2 ** 22, buffer_size=2 ** 16):
+        super().__init__(env)
+        if chunk_size % buffer_size:
+            raise ValueError("chunk_size has to be a multiple of buffer_size")
+        self.directory = directory
+        self.chunk_size = chunk_size
+        self.dtype = transition_dtype(self.env.unwrapped.size)
+        os.makedirs(directory, exist_ok=True)
+        self._chunk = len(glob.glob(os.path.join(directory, "transitions_*.bin")))
+        path = os.path.join(directory, "meta.json")
+        if self._chunk and os.path.exists(path):
+            # The existing chunks are only readable with the record type they were written with
+            with open(path) as meta:
+                dtype = np.dtype([tuple(field) for field in json.load(meta)["dtype"]])
+            if dtype != self.dtype:
+                raise ValueError(f"{directory} holds transitions of type {dtype}, "
+                                 f"recording size {self.env.unwrapped.size} writes {self.dtype}")
+        with open(path, "w") as meta:
+            json.dump({"dtype": self.dtype.descr, "size": self.env.unwrapped.size}, meta)
+
+        self._buffer = np.empty(buffer_size, dtype=self.dtype)
+        self._count = 0
+        self._chunk_count = 0
+        self._file = None
+
+    def step(self, action):
+        env = self.env.unwrapped
+        state = env.current_state - 1
+        observation, reward, terminated, truncated, info = self.env.step(action)
+
+        self._buffer[self._count] = (state, action, reward, env.next_state - 1, terminated)
+        self._count += 1
+        if self._count == len(self._buffer):
+            self.flush()
+        return observation, reward, terminated, truncated, info
+
+    def flush(self):
+        if self._count == 0:
+            return
+        if self._file is None:
+            path = os.path.join(self.directory, f"transitions_{self._chunk:05d}.bin")
+            self._file = open(path, "ab")
+        self._buffer[:self._count].tofile(self._file)
+        self._file.flush()
+        self._chunk_count += self._count
+        self._count = 0
+        if self._chunk_count >= self.chunk_size:
+            self._file.close()
+            self._file = None
+            self._chunk += 1
+            self._chunk_count = 0
+
+    def close(self):
+        self.flush()
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+        return super().close()
+
+
+class TrajectoryDataset:
+    """
+    Read-only view of the chunks written by `TrajectoryRecorder`.
+
+    Every chunk is memory-mapped, so nothing is loaded up front; indexing and `sample` only
+    gather the records they return.
+    """
+
+    def __init__(self, directory):
+        with open(os.path.join(directory, "meta.json")) as meta:
+            self.dtype = np.dtype([tuple(field) for field in json.load(meta)["dtype"]])
+        paths = sorted(glob.glob(os.path.join(directory, "transitions_*.bin")))
+        self.chunks = [np.memmap(path, dtype=self.dtype, mode="r") for path in paths if os.path.getsize(path)]
+        self._offsets = np.cumsum([0] + [len(chunk) for chunk in self.chunks])
+
+    def __len__(self):
+        return int(self._offsets[-1])
+
+    def __getitem__(self, index):
+        index = np.asarray(index)
+        if index.ndim == 0:
+            chunk = np.searchsorted(self._offsets, index, side="right") - 1
+            return self.chunks[chunk][index - self._offsets[chunk]]
+        batch = np.empty(index.shape, dtype=self.dtype)
+        chunks = np.searchsorted(self._offsets, index, side="right") - 1
+        for chunk in np.unique(chunks):
+            selected = chunks == chunk
+            batch[selected] = self.chunks[chunk][index[selected] - self._offsets[chunk]]
+        return batch
+
+    def sample(self, batch_size, rng=None):
+        if rng is None:
+            rng = np.random.default_rng()
+        return self[rng.integers(0, len(self), size=batch_size)]
@@ -0,0 +1,96 @@
+import numpy as np
+from gym.spaces import Box, Discrete
+from gym.vector import VectorEnvWrapper
+from gym.vector.utils import batch_space
+
+
+class VectorClipReward(VectorEnvWrapper):
+    """`ClipReward` for a whole (N,) batch of rewards at once."""
+
+    def __init__(self, env, min_reward, max_reward):
+        super().__init__(env)
+        self.min_reward = min_reward
+        self.max_reward = max_reward
+        self.reward_range = (min_reward, max_reward)
+
+    def step_wait(self):
+        observations, rewards, terminated, truncated, infos = self.env.step_wait()
+        return observations, np.clip(rewards, self.min_reward, self.max_reward), terminated, truncated, infos
+
+
+class VectorRewardWeight(VectorEnvWrapper):
+    """Multiplies every reward of the batch by a fixed `weight`."""
+
+    def __init__(self, env, weight):
+        super().__init__(env)
+        self.weight = weight
+
+    def step_wait(self):
+        observations, rewards, terminated, truncated, infos = self.env.step_wait()
+        return observations, self.weight * rewards, terminated, truncated, infos
+
+
+class VectorWeightedReward(VectorEnvWrapper):
+    """
+    `ReacherRewardWrapper` for a batch: the rewards become the weighted sum of the (N,) `reward_dist`
+    and `reward_ctrl` info arrays, e.g. of `PotentialShaping` envs in a `gym.vector.SyncVectorEnv`.
+
+    Envs that autoreset report their last step in `final_info` where the vector env keeps it.
+    Envs whose step left no such info, as gym 0.26.0 drops it on autoreset, keep their own reward.
+    """
+
+    def __init__(self, env, reward_dist_weight, reward_ctrl_weight):
+        super().__init__(env)
+        self.reward_dist_weight = reward_dist_weight
+        self.reward_ctrl_weight = reward_ctrl_weight
+
+    def step_wait(self):
+        observations, rewards, terminated, truncated, infos = self.env.step_wait()
+        reward_dist, found = self._info_array(infos, "reward_dist")
+        reward_ctrl, _ = self._info_array(infos, "reward_ctrl")
+        weighted = self.reward_dist_weight * reward_dist + self.reward_ctrl_weight * reward_ctrl
+        return observations, np.where(found, weighted, rewards), terminated, truncated, infos
+
+    def _info_array(self, infos, key):
+        values = np.array(infos.get(key, np.zeros(self.num_envs)), dtype=float)
+        found = np.array(infos.get(f"_{key}", np.zeros(self.num_envs)), dtype=bool)
+        if "final_info" in infos:
+            for index in np.flatnonzero(infos["_final_info"]):
+                values[index] = infos["final_info"][index][key]
+                found[index] = True
+        return values, found
+
+
+class VectorRelativePosition(VectorEnvWrapper):
+    """`RelativePosition` for a batch: the (N, 3) array `target - agent`."""
+
+    def __init__(self, env):
+        super().__init__(env)
+        self.single_observation_space = Box(shape=(3,), low=-np.inf, high=np.inf)
+        self.observation_space = batch_space(self.single_observation_space, env.num_envs)
+
+    def observation(self, observations):
+        return observations["target"] - observations["agent"]
+
+    def reset_wait(self, **kwargs):
+        observations, infos = self.env.reset_wait(**kwargs)
+        return self.observation(observations), infos
+
+    def step_wait(self):
+        observations, rewards, terminated, truncated, infos = self.env.step_wait()
+        if "final_observation" in infos:
+            infos["final_observation"] = self.observation(infos["final_observation"])
+        return self.observation(observations), rewards, terminated, truncated, infos
+
+
+class VectorDiscreteActions(VectorEnvWrapper):
+    """`DiscreteActions` for a batch: the (N,) discrete actions index a table of env actions."""
+
+    def __init__(self, env, disc_to_cont):
+        super().__init__(env)
+        self.disc_to_cont = np.asarray(disc_to_cont)
+        self.single_action_space = Discrete(len(disc_to_cont))
+        self.action_space = batch_space(self.single_action_space, env.num_envs)
+
+    def step_async(self, actions):
+        return self.env.step_async(self.disc_to_cont[np.asarray(actions)])
@@ -1,8 +1,21 @@
 import numpy as np
-from mpl_toolkits.mplot3d import Axes3D
-from mpl_toolkits.mplot3d.art3d import Poly3DCollection
+
+# matplotlib is imported inside the drawing functions, so importing the helpers stays cheap
 
 def draw3d_target_cube(location: np.array, color= str):
+    from mpl_toolkits.mplot3d.art3d import Poly3DCollection
+    # Create a Poly3DCollection and add it to the plot
+    return Poly3DCollection(cube_faces(location), linewidths=1, facecolor = color,edgecolor=color, alpha=0.2)
+
+
+def draw3d_cubes(locations, color= str):
+    from mpl_toolkits.mplot3d.art3d import Poly3DCollection
+    # All cubes share one Poly3DCollection, so many obstacles cost a single artist
+    faces = [face for location in locations for face in cube_faces(location)]
+    return Poly3DCollection(faces, linewidths=1, facecolor = color,edgecolor=color, alpha=0.2)
+
+
+def cube_faces(location: np.array):
     # Define the vertices of the target cube (8 vertices)
     x, y, z = location[0], location[1], location[2]
     vertices = [
@@ -25,9 +38,7 @@ def draw3d_target_cube(location: np.array, color= str):
         [vertices[0], vertices[3], vertices[7], vertices[4]],
         [vertices[1], vertices[2], vertices[6], vertices[5]]
     ]
-
-    # Create a Poly3DCollection and add it to the plot
-    return Poly3DCollection(faces, linewidths=1, facecolor = color,edgecolor=color, alpha=0.2)
+    return faces
 
 
 def draw3d_agent_sphere(center, radius, num_points=10):
@@ -1,13 +1,283 @@
+import os
+import subprocess
 import pytest
 import gym
 
 import sys
 sys.path.append("../src")
 from src.cube_gym.envs.cube_gym import *
+from src.cube_gym.envs.occupancy import move_table
 
 
 class TestCubeGym:
 
     def test_CubeGym_init(self):
         env = CubeGym()
-        assert env.size == 5
\ No newline at end of file
+        assert env.size == 5
+
+    def test_get_reward_matches_obstacle_scan(self):
+        env = CubeGym(size=6)
+        env.set_obstacles([[2, 2, 2], [2, 2, 2], [3, 2, 2], [0, 0, 6], [5, 5, 5]])
+        env.reset()
+        for location in np.ndindex(6, 6, 6):
+            env._agent_location = np.array(location)
+            for action in range(env.nActions):
+                # Reference: the original per-obstacle scan
+                expected = None
+                penalty = 0
+                for obstacle in env._obstacles:
+                    if np.array_equal(env._agent_location, obstacle):
+                        expected = (True, -20, False)
+                        break
+                    elif np.linalg.norm(env._agent_location - obstacle, ord=1) == 1:
+                        penalty -= 10
+                terminated, reward, reached_goal = env.get_reward(action)
+                if expected is not None:
+                    assert (terminated, reward, reached_goal) == expected
+                elif not terminated:
+                    assert reward == penalty - 1
+
+    def test_transition_model_matches_step(self):
+        env = CubeGym(size=5)
+        env.reset()
+        model = env.transition_model()
+        assert model is env.transition_model()
+        for state in range(env.nStates):
+            for action in range(env.nActions):
+                env.reset()
+                env._agent_location = np.array([state % 5, (state // 5) % 5, state // 25])
+                env.current_state = state + 1
+                _, reward, terminated, _, info = env.step(action)
+                assert model.next_state[state, action] == info["next_state"] - 1
+                assert model.reward[state, action] == reward
+                assert model.terminated[state, action] == terminated
+                assert model.reached_goal[state, action] == info["reached_goal"]
+
+    def test_human_render_updates_match_full_redraw(self):
+        import pygame
+        os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+        env = CubeGym(render_mode="human", size=8)
+        env.metadata = dict(env.metadata, render_fps=10000)
+        env.reset()
+        for action in [0, 1, 0, 4, 1]:
+            env.step(action)
+        env.update_canvas()
+        env.update_window()
+        incremental = pygame.surfarray.array3d(env.window).copy()
+
+        env._layers_key = None
+        env.update_canvas()
+        env.update_window()
+        assert np.array_equal(incremental, pygame.surfarray.array3d(env.window))
+        env.close()
+
+    def test_3d_array_scene_is_reused(self):
+        env = CubeGym(render_mode="3d_array", size=4)
+        env.reset()
+        first = env.render().copy()
+        collections = len(env._offscreen_fig.axes[0].collections)
+        for action in [0, 1, 4]:
+            env.step(action)
+            frame = env.render()
+        assert frame.shape == first.shape and frame.dtype == np.uint8
+        assert not np.array_equal(frame, first)
+        assert len(env._offscreen_fig.axes) == 1
+        assert len(env._offscreen_fig.axes[0].collections) == collections
+
+    def test_headless_construction_skips_rendering_libraries(self):
+        script = (
+            "import sys\n"
+            "from cube_gym.envs.cube_gym import CubeGym\n"
+            "env = CubeGym(render_mode=None)\n"
+            "env.reset()\n"
+            "env.step(0)\n"
+            "loaded = [name for name in ('pygame', 'matplotlib') if name in sys.modules]\n"
+            "assert not loaded, loaded\n"
+            "env = CubeGym(render_mode='rgb_array')\n"
+            "env.reset()\n"
+            "assert env.render().shape[-1] == 3\n"
+            "assert 'pygame' not in sys.modules\n"
+        )
+        src = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "src")
+        environment = dict(os.environ, PYTHONPATH=src)
+        result = subprocess.run([sys.executable, "-c", script], env=environment, capture_output=True, text=True)
+        assert result.returncode == 0, result.stderr
+
+    def test_fast_mode_matches_step(self):
+        env = CubeGym(size=5)
+        fast_env = CubeGym(size=5, fast=True, record_info=True)
+        env.reset()
+        observation, info = fast_env.reset()
+        agent_buffer = observation["agent"]
+        for action in np.random.default_rng(1).integers(0, 5, size=300):
+            expected = env.step(action)
+            observation, reward, terminated, truncated, info = fast_env.step(action)
+            assert observation["agent"] is agent_buffer
+            assert np.array_equal(observation["agent"], expected[0]["agent"])
+            assert (reward, terminated, truncated) == expected[1:4]
+            assert info["reached_goal"] == expected[4]["reached_goal"]
+            assert info["next_state"] == expected[4]["next_state"]
+            if terminated:
+                env.reset()
+                agent_buffer = fast_env.reset()[0]["agent"]
+        assert fast_env._path == []
+
+    def test_sparse_occupancy_matches_dense(self):
+        from src.cube_gym.envs.occupancy import Occupancy, SparseOccupancy
+        obstacles = np.random.default_rng(2).integers(-1, 9, size=(40, 3))
+        dense, sparse = Occupancy(obstacles, 8), SparseOccupancy(obstacles, 8)
+        cells = np.arange(8 ** 3)
+        assert np.array_equal(sparse.blocked[cells], dense.blocked)
+        assert np.array_equal(sparse.neighbours[cells], dense.neighbours)
+        assert all(sparse.neighbours[cell] == dense.neighbours[cell] for cell in cells)
+
+        env, sparse_env = CubeGym(size=8), CubeGym(size=8, sparse=True)
+        for each in (env, sparse_env):
+            each.set_obstacles(obstacles)
+            each.reset()
+        for action in np.random.default_rng(3).integers(0, 5, size=300):
+            expected = env.step(action)
+            assert sparse_env.step(action)[1:4] == expected[1:4]
+            if expected[2]:
+                env.reset()
+                sparse_env.reset()
+        assert CubeGym(size=512).sparse
+
+    def test_profiling_counts_phases_per_instance(self):
+        from src.cube_gym.envs.profiling import Profiler
+        env = CubeGym(size=5)
+        other = CubeGym(size=5)
+        dumps = []
+        profiler = env.enable_profiling(dump_every=10, dump=dumps.append)
+        env.reset()
+        other.reset()
+        for step in range(25):
+            env.step(4 if step % 2 else 0)
+            other.step(0)
+            if step % 2 == 0:
+                env.reset()
+        summary = profiler.summary()
+        assert summary["step"]["calls"] == 25 and summary["get_reward"]["calls"] == 25
+        assert summary["reset"]["calls"] == 14
+        assert sum(summary["step"]["histogram_ns"].values()) == 25
+        assert len(dumps) == 2 and other.profiler is None and "step" not in vars(other)
+
+        env.disable_profiling()
+        assert env.profiler is None and "step" not in vars(env) and "get_reward" not in vars(env)
+
+        wrapped = gym.make("cube_gym/CubeGym-v0", size=5)
+        profiler = Profiler().attach(wrapped)
+        wrapped.reset(seed=0)
+        wrapped.step(0)
+        assert profiler.calls["OrderEnforcing.step"] == 1 and profiler.calls["get_reward"] == 1
+        profiler.detach()
+        assert "profiler" not in vars(wrapped) and wrapped.unwrapped.profiler is None
+        profiler = wrapped.unwrapped.enable_profiling()
+        assert wrapped.profiler is profiler
+
+    def test_set_state_replays_the_same_steps(self):
+        for fast in (False, True):
+            env = CubeGym(size=5, fast=fast)
+            env.reset(seed=4)
+            for action in [0, 1, 4]:
+                env.step(action)
+            snapshot = env.get_state()
+            actions = np.random.default_rng(5).integers(0, 5, size=20)
+
+            def rollout():
+                results = []
+                for action in actions:
+                    observation, reward, terminated, _, _ = env.step(action)
+                    results.append((observation["agent"].tolist(), reward, terminated, env.np_random.random()))
+                    if terminated:
+                        break
+                return results
+
+            first = rollout()
+            env.set_state(snapshot)
+            assert env.steps == 3 and env.get_state().occupancy is snapshot.occupancy
+            assert rollout() == first
+
+    def test_simulate_matches_step(self):
+        env = CubeGym(size=5)
+        env.reset()
+        states = np.arange(env.nStates).repeat(env.nActions)
+        actions = np.tile(np.arange(env.nActions), env.nStates)
+        next_states, rewards, terminated, reached_goal = env.simulate(states, actions)
+        probe = CubeGym(size=5)
+        for index in np.random.default_rng(6).choice(len(states), size=200, replace=False):
+            probe.reset()
+            probe._agent_location = np.array([states[index] % 5, states[index] // 5 % 5, states[index] // 25])
+            probe.current_state = states[index] + 1
+            probe._current_location = probe._agent_location
+            _, reward, done, _, info = probe.step(actions[index])
+            assert (rewards[index], terminated[index], reached_goal[index]) == (reward, done, info["reached_goal"])
+            assert next_states[index] == probe.next_state - 1
+        assert env.get_state().agent_location.tolist() == [0, 0, 0]
+
+    def test_max_episode_steps_truncates(self):
+        for fast in (False, True):
+            env = CubeGym(size=5, fast=fast, max_episode_steps=6)
+            env.reset()
+            outcomes = [env.step(action)[2:4] for action in [0, 2, 0, 2, 0, 2]]
+            assert outcomes[:5] == [(False, False)] * 5 and outcomes[5] == (False, True)
+            env.reset()
+            assert env.step(0)[2:4] == (False, False)
+
+    def test_action_sets_and_random_targets(self):
+        for actions, count in (("axes", 6), ("neighbours", 26)):
+            env = CubeGym(size=5, actions=actions, targets="random", num_targets=3)
+            assert env.nActions == count and env.observation_space["target"].shape == (3, 3)
+            rng = np.random.default_rng(7)
+            for episode in range(20):
+                observation, _ = env.reset(seed=episode)
+                targets = {tuple(target) for target in observation["target"]}
+                assert len(targets) == 3 and (0, 0, 0) not in targets
+                model = env.transition_model()
+                terminated = False
+                while not terminated:
+                    state = env.current_state - 1
+                    action = rng.integers(0, count)
+                    location = env._agent_location + env._action_to_direction[action]
+                    _, reward, terminated, _, info = env.step(action)
+                    assert (reward, terminated) == (model.reward[state, action], model.terminated[state, action])
+                    outside = np.any(location < 0) or np.any(location >= 5)
+                    assert info["reached_goal"] == (not outside and reward == 100 and tuple(location) in targets)
+
+    def test_fast_mode_with_random_targets_reuses_the_model(self):
+        env = CubeGym(size=4, targets="random", num_targets=2)
+        fast_env = CubeGym(size=4, fast=True, targets="random", num_targets=2)
+        rng = np.random.default_rng(3)
+        for episode in range(30):
+            env.reset(seed=episode)
+            fast_env.reset(seed=episode)
+            if episode == 0:
+                model = fast_env._model
+            assert fast_env._model is model
+            terminated = truncated = False
+            while not (terminated or truncated):
+                action = rng.integers(0, 5)
+                expected = env.step(action)
+                observation, reward, terminated, truncated, info = fast_env.step(action)
+                assert np.array_equal(observation["agent"], expected[0]["agent"])
+                assert (reward, terminated, truncated) == expected[1:4]
+                assert info["reached_goal"] == expected[4]["reached_goal"]
+
+    def test_fast_mode_follows_a_layout_swap_mid_episode(self):
+        env = CubeGym(size=5)
+        fast_env = CubeGym(size=5, fast=True)
+        for each in (env, fast_env):
+            each.reset()
+            each.set_obstacles([[2, 0, 0], [0, 1, 0]])
+        assert env.step(0)[1] == fast_env.step(0)[1] == -11
+
+    def test_move_table_is_built_on_first_step_and_shared(self):
+        first, second = CubeGym(size=6, actions="neighbours"), CubeGym(size=6, actions="neighbours")
+        assert first._moves is None and second._moves is None
+        for env in (first, second):
+            env.reset()
+            env.step(0)
+        assert first._moves is second._moves
+        assert first._moves.dtype == np.int32 and not first._moves.flags.writeable
+        directions = np.array([first._action_to_direction[action] for action in range(first.nActions)])
+        assert np.array_equal(first._moves, move_table(6, directions))
@@ -0,0 +1,45 @@
+import pytest
+import numpy as np
+
+import sys
+sys.path.append("../src")
+from src.cube_gym.envs.cube_gym import CubeGym
+from src.cube_gym.envs.cube_gym_vector import CubeGymVector
+
+
+class TestCubeGymVector:
+
+    def test_CubeGymVector_matches_CubeGym(self):
+        num_envs = 8
+        vector_env = CubeGymVector(num_envs=num_envs, size=5, max_episode_steps=7)
+        envs = [CubeGym(size=5, max_episode_steps=7) for _ in range(num_envs)]
+        vector_env.reset()
+        for env in envs:
+            env.reset()
+
+        rng = np.random.default_rng(0)
+        for _ in range(200):
+            actions = rng.integers(0, 5, size=num_envs)
+            observations, rewards, terminated, truncated, infos = vector_env.step(actions)
+            for i, env in enumerate(envs):
+                observation, reward, done, cut_off, info = env.step(actions[i])
+                assert rewards[i] == reward
+                assert terminated[i] == done and truncated[i] == cut_off
+                assert infos["reached_goal"][i] == info["reached_goal"]
+                assert infos["next_state"][i] == info["next_state"]
+                if done or cut_off:
+                    env.reset()
+                    assert np.array_equal(infos["final_observation"]["agent"][i], observation["agent"])
+                assert np.array_equal(observations["agent"][i], env._agent_location)
+
+    def test_rgb_array_frames_match_CubeGym(self):
+        vector_env = CubeGymVector(num_envs=3, size=5, render_mode="rgb_array")
+        env = CubeGym(size=5, render_mode="rgb_array")
+        vector_env.reset()
+        vector_env.step(np.array([0, 1, 4]))
+        frames = vector_env.render()
+        assert frames.shape == (3, 80, 80, 3) and frames.dtype == np.uint8
+        for i, action in enumerate([0, 1, 4]):
+            env.reset()
+            env.step(action)
+            assert np.array_equal(frames[i], env.render())
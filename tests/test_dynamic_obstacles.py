@@ -0,0 +1,81 @@
+import pytest
+import numpy as np
+
+import sys
+sys.path.append("../src")
+from src.cube_gym.envs.cube_gym import CubeGym
+from src.cube_gym.envs.cube_gym_vector import CubeGymVector
+from src.cube_gym.envs.dynamic_obstacles import RandomWalk
+from src.cube_gym.envs.occupancy import Occupancy, SparseOccupancy
+
+
+class TestDynamicObstacles:
+
+    def test_incremental_updates_match_rebuild(self):
+        env = CubeGym(size=8, obstacle_motion=RandomWalk(moving=4, probability=0.7))
+        twin = CubeGym(size=8, obstacle_motion=RandomWalk(moving=4, probability=0.7))
+        initial = np.array(env._obstacles)
+        rng = np.random.default_rng(8)
+        for episode in range(3):
+            env.reset(seed=episode)
+            twin.reset(seed=episode)
+            assert np.array_equal(env._occupancy.obstacles, initial)
+            terminated = False
+            while not terminated:
+                action = rng.integers(0, 5)
+                _, reward, terminated, _, _ = env.step(action)
+                assert twin.step(action)[1] == reward
+                assert np.array_equal(env._occupancy.obstacles, twin._occupancy.obstacles)
+                rebuilt = Occupancy(env._occupancy.obstacles, 8)
+                assert np.array_equal(env._occupancy.blocked, rebuilt.blocked)
+                assert np.array_equal(env._occupancy.neighbours, rebuilt.neighbours)
+                assert np.array_equal(np.array(env._obstacles), env._occupancy.obstacles)
+            assert not np.array_equal(env._occupancy.obstacles, initial)
+
+    def test_sparse_moves_match_rebuild(self):
+        rng = np.random.default_rng(4)
+        occupancy = SparseOccupancy(rng.integers(-1, 7, size=(40, 3)), 6)
+        for _ in range(50):
+            indices = rng.choice(40, size=rng.integers(0, 4), replace=False)
+            occupancy.move(indices, rng.integers(-1, 7, size=(len(indices), 3)))
+            rebuilt = SparseOccupancy(occupancy.obstacles, 6)
+            for table, expected in ((occupancy.blocked, rebuilt.blocked), (occupancy.neighbours, rebuilt.neighbours)):
+                assert np.array_equal(table.cells, expected.cells) and np.array_equal(table.values, expected.values)
+                assert table._lookup == expected._lookup and table.values.dtype == expected.values.dtype
+
+    def test_snapshots_keep_their_layout(self):
+        env = CubeGym(size=8, obstacle_motion=RandomWalk(moving=6))
+        env.reset(seed=1)
+        snapshot = env.get_state()
+        first = [env.step(4)[1:3] for _ in range(5)]
+        env.set_state(snapshot)
+        assert [env.step(4)[1:3] for _ in range(5)] == first
+
+    def test_vector_env_shares_moving_obstacles(self):
+        env = CubeGymVector(num_envs=16, size=8, obstacle_motion=RandomWalk(moving=6))
+        env.reset(seed=2)
+        initial = env._obstacles.copy()
+        for actions in np.random.default_rng(9).integers(0, 5, size=(30, 16)):
+            cells = env._cells.copy()
+            occupancy = Occupancy(env._obstacles.copy(), 8)
+            _, rewards, terminated, _, _ = env.step(actions)
+            expected = np.where(occupancy.blocked[cells], -20, -1.0 - 10.0 * occupancy.neighbours[cells])
+            moved = ~terminated
+            assert np.array_equal(rewards[moved], expected[moved])
+        rebuilt = Occupancy(env._obstacles, 8)
+        assert np.array_equal(env._occupancy.neighbours, rebuilt.neighbours)
+        env.reset()
+        assert np.array_equal(env._obstacles, initial)
+
+    def test_reset_after_restoring_a_moved_snapshot(self):
+        env = CubeGym(size=8, obstacle_motion=RandomWalk())
+        env.reset(seed=0)
+        for _ in range(3):
+            env.step(4)
+        state = env.get_state()
+        assert not np.array_equal(env._occupancy.obstacles, env._initial_layout)
+        env.reset()
+        env.set_state(state)
+        env.reset()
+        assert np.array_equal(env._occupancy.obstacles, env._initial_layout)
+        assert np.array_equal(env._occupancy.blocked, Occupancy(env._initial_layout, 8).blocked)
@@ -0,0 +1,81 @@
+import pytest
+import numpy as np
+
+import sys
+sys.path.append("../src")
+from src.cube_gym.envs.cube_gym import CubeGym
+from src.cube_gym.envs.dynamic_obstacles import RandomWalk
+from src.cube_gym.envs.env_spec import EnvSpec, TableCache
+from src.cube_gym.solvers import solve
+# The env imports its solvers as `cube_gym`, so its cache lives in that module
+from cube_gym.envs.transition_model import _cached_transition_model
+from cube_gym.solvers.shortest_path import _cached_distance_field
+from src.cube_gym.wrappers import PotentialShaping
+
+
+class TestEnvSpec:
+
+    def test_spec_is_hashable_and_round_trips(self):
+        obstacles = np.random.default_rng(0).integers(0, 6, size=(20, 3))
+        spec = EnvSpec.create(size=6, obstacles=obstacles, actions="axes", rewards=(-1, -5, 50, -30))
+        assert spec == EnvSpec.create(size=6, obstacles=obstacles[::-1], actions="axes", rewards=(-1, -5, 50, -30))
+        assert hash(spec) == hash(EnvSpec.from_json(spec.to_json()))
+        assert spec.key == EnvSpec.from_json(spec.to_json()).key
+        assert spec.key != spec._replace(size=7).key
+
+        env = CubeGym(size=6, obstacles=obstacles, actions="axes", rewards=(-1, -5, 50, -30))
+        assert EnvSpec.from_env(env) == spec
+
+    def test_cached_tables_match_a_fresh_env(self, tmp_path):
+        obstacles = np.random.default_rng(1).integers(0, 7, size=(40, 3))
+        spec = EnvSpec.create(size=7, obstacles=obstacles, rewards=(-2, -10, 100, -20))
+        cache = TableCache(str(tmp_path))
+        tables = cache.get(spec)
+        assert not tables.blocked.flags.writeable
+        assert cache.get(spec).moves.filename == tables.moves.filename
+
+        for fast in (False, True):
+            fresh = CubeGym(size=7, obstacles=obstacles, rewards=(-2, -10, 100, -20), fast=fast)
+            warm = CubeGym.from_spec(spec, cache, fast=fast)
+            fresh.reset(seed=0)
+            warm.reset(seed=0)
+            actions = np.random.default_rng(2).integers(0, 5, size=300)
+            for action in actions:
+                expected, actual = fresh.step(action), warm.step(action)
+                np.testing.assert_array_equal(expected[0]["agent"], actual[0]["agent"])
+                assert expected[1:4] == actual[1:4]
+                if expected[2]:
+                    fresh.reset()
+                    warm.reset()
+        np.testing.assert_array_equal(tables.distances, solve(fresh).distances)
+
+    def test_moving_obstacles_copy_mapped_tables(self, tmp_path):
+        spec = EnvSpec.create(size=6, obstacles=np.random.default_rng(3).integers(0, 6, size=(30, 3)))
+        cache = TableCache(str(tmp_path))
+        env = CubeGym.from_spec(spec, cache, obstacle_motion=RandomWalk(moving=10))
+        env.reset(seed=0)
+        for _ in range(20):
+            if env.step(0)[2]:
+                env.reset()
+        # The mapped files still hold the layout of the spec
+        fresh = CubeGym(size=6, obstacles=spec.obstacles)
+        np.testing.assert_array_equal(cache.get(spec).blocked, fresh._occupancy.blocked)
+
+    def test_distance_field_is_read_from_mapped_tables(self, tmp_path):
+        spec = EnvSpec.create(size=6, obstacles=np.random.default_rng(4).integers(0, 6, size=(30, 3)))
+        cache = TableCache(str(tmp_path))
+        env = PotentialShaping(CubeGym.from_spec(spec, cache))
+        env.reset(seed=0)
+        _cached_distance_field.cache_clear()
+        _cached_transition_model.cache_clear()
+        env.step(0)
+        assert env.unwrapped.distance_field() is env.unwrapped._tables.distances
+        np.testing.assert_array_equal(solve(env, gamma=0.97).distances, cache.get(spec).distances)
+        assert _cached_distance_field.cache_info().misses == 0
+        # The solver iterates over the mapped model rather than building its own
+        assert _cached_transition_model.cache_info().misses == 0
+
+        # Another layout no longer matches the spec, so its distances are computed
+        env.unwrapped.set_obstacles([[1, 1, 1]])
+        assert env.unwrapped.distance_field() is not env.unwrapped._tables.distances
+        assert _cached_distance_field.cache_info().misses == 1
@@ -0,0 +1,70 @@
+import pytest
+import numpy as np
+
+import sys
+sys.path.append("../src")
+from src.cube_gym.envs.cube_gym import CubeGym
+from src.cube_gym.envs.layouts import generate_layouts, obstacle_locations
+from src.cube_gym.evaluation import evaluate
+from src.cube_gym.solvers import solve
+
+
+class TestEvaluation:
+
+    def test_optimal_policies(self):
+        layouts = [obstacle_locations(layout, 6) for layout in generate_layouts(6, 0.2, 4, seed=0)]
+        env = CubeGym(size=6)
+        optimal, shortest, values = [], [], []
+        for layout in layouts:
+            env.reset(options={"obstacles": layout})
+            solution = solve(env)
+            optimal.append(solution.policy)
+            values.append(solution.values[0])
+            # Greedy descent of the distance field follows a shortest path
+            distances = np.where(solution.distances >= 0, solution.distances, env.nStates)
+            shortest.append(distances[env.transition_model().next_state].argmin(axis=1))
+
+        report = evaluate(np.stack(optimal), layouts=layouts, seeds=range(3), size=6)
+        assert report.num_episodes == 12
+        assert report.success_rate == 1.0
+        np.testing.assert_array_equal(report.returns, np.repeat(values, 3))
+
+        report = evaluate(np.stack(shortest), layouts=layouts, seeds=range(3), size=6)
+        assert report.success_rate == 1.0
+        assert report.optimality_gap == 0.0
+        np.testing.assert_array_equal(report.lengths, report.shortest)
+
+    def test_tabular_policy_matches_env(self):
+        policy = np.random.default_rng(1).integers(0, 5, size=125)
+        layouts = [np.random.default_rng(seed).integers(0, 5, size=(10, 3)) for seed in range(3)]
+        report = evaluate(policy, layouts=layouts, seeds=range(2), size=5, max_episode_steps=20,
+                          targets="random")
+
+        env = CubeGym(size=5, max_episode_steps=20, targets="random")
+        episode = 0
+        for layout in layouts:
+            for seed in range(2):
+                observation, info = env.reset(seed=seed, options={"obstacles": layout})
+                state, episode_return, length, done = info["current_state"], 0, 0, False
+                while not done:
+                    observation, reward, terminated, truncated, info = env.step(policy[state - 1])
+                    state, episode_return, length = info["next_state"], episode_return + reward, length + 1
+                    done = terminated or truncated
+                assert report.returns[episode] == episode_return
+                assert report.lengths[episode] == length
+                assert report.reached_goal[episode] == info["reached_goal"]
+                assert report.truncated[episode] == truncated
+                episode += 1
+
+    def test_callable_policy_matches_tabular(self):
+        policy = np.random.default_rng(2).integers(0, 5, size=125)
+        layouts = [np.random.default_rng(seed).integers(0, 5, size=(8, 3)) for seed in range(4)]
+
+        def act(observations):
+            agent = observations["agent"]
+            return policy[agent[:, 0] + agent[:, 1] * 5 + agent[:, 2] * 25]
+
+        tabular = evaluate(policy, layouts=layouts, seeds=range(5), size=5, targets="random", num_targets=2)
+        batched = evaluate(act, layouts=layouts, seeds=range(5), size=5, targets="random", num_targets=2)
+        for expected, actual in zip(tabular, batched):
+            np.testing.assert_array_equal(expected, actual)
@@ -0,0 +1,38 @@
+import pytest
+import numpy as np
+
+import sys
+sys.path.append("../src")
+from src.cube_gym.envs.cube_gym import CubeGym
+from src.cube_gym.envs.layouts import LayoutCache, generate_layouts, obstacle_locations
+from src.cube_gym.solvers import solve
+
+
+class TestLayouts:
+
+    def test_generated_layouts_are_solvable_and_seeded(self):
+        layouts = generate_layouts(size=6, density=0.3, count=50, seed=3)
+        assert layouts.shape == (50, 65)
+        assert np.array_equal(layouts, generate_layouts(size=6, density=0.3, count=50, seed=3))
+        env = CubeGym(size=6)
+        for layout in layouts[:10]:
+            assert len(np.unique(layout)) == len(layout)
+            env.reset(options={"obstacles": obstacle_locations(layout, 6)})
+            assert solve(env).distances[0] > 0
+
+    def test_layout_cache_round_trip(self, tmp_path):
+        cache = LayoutCache(str(tmp_path))
+        layouts = cache.get(size=5, density=0.2, seed=1, count=20)
+        assert isinstance(layouts, np.memmap)
+        assert np.array_equal(layouts, cache.get(size=5, density=0.2, seed=1, count=20))
+        assert np.array_equal(layouts, cache.get(size=5, density=0.2, seed=1, count=40)[:20])
+
+    def test_random_obstacles_are_distinct_and_seeded(self):
+        env = CubeGym(size=9)
+        env.reset(seed=4)
+        env.set_obstacles([])
+        first = np.array(env.get_obstacles(Number_of_obstacles=20, random=True))
+        env.reset(seed=4)
+        env.set_obstacles([])
+        assert np.array_equal(first, env.get_obstacles(Number_of_obstacles=20, random=True))
+        assert len(np.unique(first, axis=0)) == 20
@@ -0,0 +1,52 @@
+import pytest
+import numpy as np
+
+import sys
+sys.path.append("../src")
+from src.cube_gym.envs.cube_gym import CubeGym
+from src.cube_gym.envs.dynamic_obstacles import RandomWalk
+from src.cube_gym.wrappers.obstacle_observations import LocalOccupancy, ObstacleDistance, OneHotState
+
+
+class TestObstacleObservations:
+
+    def test_encodings_match_obstacle_scan(self):
+        env = OneHotState(ObstacleDistance(LocalOccupancy(CubeGym(size=5), k=3)))
+        inner = env.env
+        env.reset(seed=0)
+        rng = np.random.default_rng(0)
+        for episode in range(3):
+            obstacles = rng.integers(0, 5, size=(8, 3))
+            obs, _ = inner.reset(options={"obstacles": obstacles})
+            blocked = {tuple(obstacle) for obstacle in obstacles}
+            for _ in range(30):
+                agent = obs["agent"]
+                for offset in np.ndindex(3, 3, 3):
+                    cell = agent + np.array(offset) - 1
+                    outside = np.any(cell < 0) or np.any(cell >= 5)
+                    assert obs["occupancy"][offset] == int(outside or tuple(cell) in blocked)
+                for action, direction in inner.unwrapped._action_to_direction.items():
+                    cell, run = agent + direction, 0
+                    while np.all(cell >= 0) and np.all(cell < 5) and tuple(cell) not in blocked:
+                        cell, run = cell + direction, run + 1
+                    assert obs["obstacle_distance"][action] == run
+                one_hot = env.observation(obs)
+                assert one_hot.sum() == 1 and one_hot[inner.unwrapped.current_state - 1] == 1
+                obs, _, terminated, _, _ = inner.step(rng.integers(0, 5))
+                if terminated:
+                    break
+
+    def test_local_occupancy_follows_moving_obstacles(self):
+        for sparse in (False, True):
+            env = LocalOccupancy(CubeGym(size=6, sparse=sparse, obstacle_motion=RandomWalk(moving=6)), k=5)
+            rng = np.random.default_rng(1)
+            obs, _ = env.reset(seed=1)
+            for _ in range(40):
+                blocked = {tuple(obstacle) for obstacle in env.unwrapped._occupancy.obstacles}
+                for offset in np.ndindex(5, 5, 5):
+                    cell = obs["agent"] + np.array(offset) - 2
+                    outside = np.any(cell < 0) or np.any(cell >= 6)
+                    assert obs["occupancy"][offset] == int(outside or tuple(cell) in blocked)
+                obs, _, terminated, _, _ = env.step(rng.integers(0, 5))
+                if terminated:
+                    obs, _ = env.reset()
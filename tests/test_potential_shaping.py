@@ -0,0 +1,35 @@
+import pytest
+import numpy as np
+
+import sys
+sys.path.append("../src")
+from src.cube_gym.envs.cube_gym import CubeGym
+from src.cube_gym.wrappers.maneuver_planning_reward_function import ManeuverPlanningReward
+from src.cube_gym.wrappers.potential_shaping import PotentialShaping
+
+
+class TestPotentialShaping:
+
+    def test_shaping_telescopes_to_start_potential(self):
+        env = PotentialShaping(CubeGym(size=5, fast=True))
+        rng = np.random.default_rng(0)
+        for _ in range(20):
+            env.reset()
+            start_potential = env._potentials()[env.unwrapped.current_state - 1]
+            shaped, original, terminated = 0.0, 0.0, False
+            while not terminated:
+                state = env.unwrapped.current_state - 1
+                action = rng.integers(0, 5)
+                reward = env.unwrapped.transition_model().reward[state, action]
+                _, shaped_reward, terminated, _, info = env.step(action)
+                shaped += shaped_reward
+                original += reward
+                assert info["reward_ctrl"] == -1.0
+            assert shaped == pytest.approx(original - start_potential)
+
+    def test_info_keys_feed_reward_wrappers(self):
+        env = ManeuverPlanningReward(PotentialShaping(CubeGym(size=5)), 1.0, 0.5)
+        env.reset(seed=0)
+        _, reward, _, _, info = env.step(0)
+        assert info["reward_dist"] == -11
+        assert reward == pytest.approx(info["reward_dist"] + 0.5 * info["reward_ctrl"])
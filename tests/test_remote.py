@@ -0,0 +1,79 @@
+import asyncio
+import os
+import tempfile
+
+import pytest
+import numpy as np
+
+import sys
+sys.path.append("../src")
+from src.cube_gym.envs.cube_gym import CubeGym
+from src.cube_gym.remote import EnvClient, EnvServer, RemoteEnvError
+from src.cube_gym.remote import protocol
+
+
+class TestEnvServer:
+
+    def test_coalesced_steps_match_CubeGym(self):
+        async def actor(path, seed):
+            client = await EnvClient.connect(path)
+            env_ids, observations = await client.allocate(3)
+            envs = [CubeGym(size=5, max_episode_steps=12) for _ in env_ids]
+            for env in envs:
+                env.reset()
+            rng = np.random.default_rng(seed)
+            for _ in range(40):
+                actions = rng.integers(0, 5, size=3)
+                observations, rewards, terminated, truncated, infos = await client.step(env_ids, actions)
+                for i, (env, action) in enumerate(zip(envs, actions)):
+                    observation, reward, done, cut_off, info = env.step(action)
+                    assert (rewards[i], terminated[i], truncated[i]) == (reward, done, cut_off)
+                    assert infos["reached_goal"][i] == info["reached_goal"]
+                    if done or cut_off:
+                        assert np.array_equal(infos["final_observation"]["agent"][i], observation["agent"])
+                        observation = env.reset()[0]
+                    assert np.array_equal(observations["agent"][i], observation["agent"])
+            with pytest.raises(RemoteEnvError):
+                await client.step([env_ids[0], env_ids[0]], [0, 0])
+            await client.close()
+
+        async def main(path):
+            server = EnvServer(num_envs=64, size=5, max_episode_steps=12)
+            await server.start(path)
+            await asyncio.gather(*(actor(path, seed) for seed in range(16)))
+            await server.close()
+            return server
+
+        with tempfile.TemporaryDirectory() as directory:
+            server = asyncio.run(main(os.path.join(directory, "env.sock")))
+        assert server.requests >= 16 * 40 and server.batches < server.requests
+        assert np.all(server._owners == -1)
+
+    def test_disconnect_mid_request_frees_the_envs(self):
+        async def main(path):
+            server = EnvServer(num_envs=8, size=5)
+            await server.start(path)
+            client = await EnvClient.connect(path)
+            env_ids, _ = await client.allocate(4)
+            # A STEP header for four envs, followed by only part of its payload
+            request = protocol.encode_request(protocol.STEP, env_ids, np.zeros(4, dtype=int))
+            client._writer.write(request[:protocol.HEADER.size + 3])
+            await client._writer.drain()
+            client._writer.close()
+            for _ in range(100):
+                if np.all(server._owners == -1):
+                    break
+                await asyncio.sleep(0.01)
+            await server.close()
+            return server
+
+        # The loop's exception handler sees any exception a connection handler let escape
+        loop_errors = []
+        loop = asyncio.new_event_loop()
+        loop.set_exception_handler(lambda loop, context: loop_errors.append(context))
+        with tempfile.TemporaryDirectory() as directory:
+            try:
+                server = loop.run_until_complete(main(os.path.join(directory, "env.sock")))
+            finally:
+                loop.close()
+        assert np.all(server._owners == -1) and not loop_errors
@@ -0,0 +1,40 @@
+import pytest
+import numpy as np
+
+import sys
+sys.path.append("../src")
+from src.cube_gym.envs.cube_gym_vector import CubeGymVector
+from src.cube_gym.envs.rollout_pool import CubeGymPool
+
+
+class TestCubeGymPool:
+
+    def test_pool_matches_CubeGymVector(self):
+        pool = CubeGymPool(num_workers=2, envs_per_worker=4, size=5, max_episode_steps=9)
+        vector_env = CubeGymVector(num_envs=8, size=5, max_episode_steps=9)
+        try:
+            observations, infos = pool.reset(seed=0)
+            expected, _ = vector_env.reset(seed=0)
+            assert np.array_equal(observations["agent"], expected["agent"])
+            rng = np.random.default_rng(0)
+            for _ in range(100):
+                actions = rng.integers(0, 5, size=8)
+                observations, rewards, terminated, truncated, infos = pool.step(actions)
+                expected = vector_env.step(actions)
+                assert np.array_equal(observations["agent"], expected[0]["agent"])
+                assert np.array_equal(rewards, expected[1])
+                assert np.array_equal(terminated, expected[2])
+                assert np.array_equal(truncated, expected[3])
+                if (terminated | truncated).any():
+                    assert np.array_equal(infos["final_observation"]["agent"][terminated | truncated],
+                                          expected[4]["final_observation"]["agent"][terminated | truncated])
+        finally:
+            pool.close()
+
+    def test_action_space_follows_the_action_set(self):
+        pool = CubeGymPool(num_workers=1, envs_per_worker=2, size=5, actions="neighbours")
+        try:
+            assert pool.single_action_space.n == 26
+            assert np.array_equal(pool.action_space.nvec, [26, 26])
+        finally:
+            pool.close()
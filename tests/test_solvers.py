@@ -0,0 +1,46 @@
+import pytest
+import numpy as np
+from collections import deque
+
+import sys
+sys.path.append("../src")
+from src.cube_gym.envs.cube_gym import CubeGym
+from src.cube_gym.solvers import solve
+
+
+class TestSolvers:
+
+    def test_policy_return_matches_value(self):
+        env = CubeGym(size=5)
+        observation, info = env.reset()
+        solution = solve(env, gamma=1.0)
+        state, episode_return, terminated = info["current_state"], 0, False
+        while not terminated:
+            observation, reward, terminated, truncated, info = env.step(solution.policy[state - 1])
+            state = info["next_state"]
+            episode_return += reward
+        assert episode_return == solution.values[0]
+
+    def test_distances_match_breadth_first_search(self):
+        env = CubeGym(size=6)
+        env.set_obstacles(np.random.default_rng(0).integers(0, 6, size=(40, 3)))
+        env.reset()
+        distances = solve(env).distances
+
+        # Reference: a plain forward search from every start cell
+        blocked = {tuple(obstacle) for obstacle in env._obstacles}
+        target = tuple(env._target_location)
+        for start in np.ndindex(6, 6, 6):
+            expected = -1
+            seen, queue = {start}, deque([(start, 0)])
+            while queue and start not in blocked:
+                cell, depth = queue.popleft()
+                if cell == target:
+                    expected = depth
+                    break
+                for direction in env._action_to_direction.values():
+                    nxt = tuple(np.add(cell, direction))
+                    if all(0 <= c < 6 for c in nxt) and nxt not in seen and (nxt == target or nxt not in blocked):
+                        seen.add(nxt)
+                        queue.append((nxt, depth + 1))
+            assert distances[start[0] + start[1] * 6 + start[2] * 36] == expected
@@ -0,0 +1,43 @@
+import pytest
+import numpy as np
+
+import sys
+sys.path.append("../src")
+from src.cube_gym.envs.cube_gym import CubeGym
+from src.cube_gym.wrappers.trajectory_recorder import TrajectoryDataset, TrajectoryRecorder
+
+
+class TestTrajectoryRecorder:
+
+    def test_recorded_transitions_read_back(self, tmp_path):
+        env = TrajectoryRecorder(CubeGym(size=5, fast=True), str(tmp_path), chunk_size=64, buffer_size=16)
+        env.reset(seed=0)
+        expected = []
+        for action in np.random.default_rng(0).integers(0, 5, size=250):
+            state = env.unwrapped.current_state - 1
+            observation, reward, terminated, truncated, info = env.step(action)
+            expected.append((state, action, reward, env.unwrapped.next_state - 1, terminated))
+            if terminated:
+                env.reset()
+        env.close()
+
+        dataset = TrajectoryDataset(str(tmp_path))
+        assert len(dataset) == 250 and len(dataset.chunks) == 4
+        for index in [0, 63, 64, 200, 249]:
+            assert tuple(dataset[index].tolist()) == pytest.approx(expected[index])
+        batch = dataset[np.array([249, 0, 130])]
+        assert batch["state"].dtype == np.uint16
+        assert batch["action"].tolist() == [expected[i][1] for i in (249, 0, 130)]
+        assert len(dataset.sample(32, np.random.default_rng(1))) == 32
+
+    def test_appending_needs_the_same_record_type(self, tmp_path):
+        env = TrajectoryRecorder(CubeGym(size=5, fast=True), str(tmp_path), chunk_size=16, buffer_size=16)
+        env.reset(seed=0)
+        for _ in range(16):
+            env.step(0)
+            env.reset()
+        env.close()
+        with pytest.raises(ValueError):
+            TrajectoryRecorder(CubeGym(size=50), str(tmp_path))
+        TrajectoryRecorder(CubeGym(size=6), str(tmp_path)).close()
+        assert len(TrajectoryDataset(str(tmp_path))) == 16
@@ -0,0 +1,62 @@
+import pytest
+import gym
+import numpy as np
+
+import sys
+sys.path.append("../src")
+from src.cube_gym.envs.cube_gym import CubeGym
+from src.cube_gym.envs.cube_gym_vector import CubeGymVector
+from src.cube_gym.wrappers.clip_reward import ClipReward
+from src.cube_gym.wrappers.discrete_actions import DiscreteActions
+from src.cube_gym.wrappers.potential_shaping import PotentialShaping
+from src.cube_gym.wrappers.relative_position import RelativePosition
+from src.cube_gym.wrappers.vector import (
+    VectorClipReward, VectorDiscreteActions, VectorRelativePosition, VectorRewardWeight, VectorWeightedReward
+)
+
+
+class TestVectorWrappers:
+
+    def test_vector_stack_matches_single_env_stack(self):
+        table = [4, 0, 1, 2, 3]
+        vector_env = VectorRelativePosition(VectorRewardWeight(
+            VectorClipReward(VectorDiscreteActions(CubeGymVector(num_envs=4, size=5), table), -5, 50), 0.5))
+        envs = [RelativePosition(ClipReward(DiscreteActions(CubeGym(size=5), table), -5, 50)) for _ in range(4)]
+
+        observations, _ = vector_env.reset(seed=0)
+        expected = [env.reset()[0] for env in envs]
+        assert np.array_equal(observations, expected)
+        assert vector_env.single_observation_space.shape == (3,)
+        assert vector_env.action_space.shape == (4,)
+        for actions in np.random.default_rng(0).integers(0, 5, size=(100, 4)):
+            observations, rewards, terminated, _, infos = vector_env.step(actions)
+            for i, (env, action) in enumerate(zip(envs, actions)):
+                observation, reward, done, _, _ = env.step(action)
+                assert rewards[i] == pytest.approx(0.5 * reward) and terminated[i] == done
+                if done:
+                    assert np.array_equal(infos["final_observation"][i], observation)
+                    observation = env.reset()[0]
+                assert np.array_equal(observations[i], observation)
+
+    def test_weighted_reward_matches_single_env_wrapper(self):
+        vector_env = VectorWeightedReward(gym.vector.SyncVectorEnv(
+            [lambda: PotentialShaping(CubeGym(size=4, max_episode_steps=10, record_info=False)) for _ in range(3)]),
+            0.5, 2.0)
+        envs = [PotentialShaping(CubeGym(size=4, max_episode_steps=10, record_info=False)) for _ in range(3)]
+        vector_env.reset(seed=0)
+        for env in envs:
+            env.reset()
+        resets = 0
+        for actions in np.random.default_rng(2).integers(0, 5, size=(60, 3)):
+            _, rewards, terminated, truncated, _ = vector_env.step(actions)
+            for i, (env, action) in enumerate(zip(envs, actions)):
+                _, reward, done, cut_off, info = env.step(action)
+                assert (terminated[i], truncated[i]) == (done, cut_off)
+                if done or cut_off:
+                    # Unless the vector env keeps the info of autoreset envs, their own reward is passed on
+                    assert rewards[i] in (pytest.approx(reward), pytest.approx(0.5 * info["reward_dist"] - 2.0))
+                    env.reset()
+                    resets += 1
+                else:
+                    assert rewards[i] == pytest.approx(0.5 * info["reward_dist"] + 2.0 * info["reward_ctrl"])
+        assert resets > 0